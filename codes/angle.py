@@ -1,5 +1,9 @@
+import typing
 import numpy as np
 import pandas as pd
+import pbc
+import stats
+import atom_table
 import read_lmp_data as relmp
 import read_json as rejs
 import get_prompt
@@ -12,40 +16,103 @@ class Doc:
     Input:
         Two main input must be abale to read:
             data: from `write_data` command
+            traj: from `dump` command, frame by frame
     Output:
+        Average HOH angle of all the molecules of all the frames
         Files contains informations
+            water_dipole.txt: histogram of cos of the angle between the
+                dipole (O -> middle of H1 and H2) and the z axis, in
+                slabs along z
+            water_oh.txt: same for both the OH bonds
+        Each row of the files is: z of the slab, cos(theta), count
+        The slabs are taken over the box of each frame, and the z of a
+        molecule is the z of its oxygen.
+    Each frame is done in two steps: `analyse` gets the values of the
+    frame without changing the sums, and `accumulate` adds them to the
+    sums. So the frames can be analysed by other processes, and their
+    values added here in the order of the frames.
     """
 
 
-class Angle:
-    """get data and calculate the orientation for water"""
-    def __init__(self,
-                 obj: relmp.ReadData,
-                 files: get_prompt.Prompts) -> None:
-        print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
-              f'\tGetting water molecules{bcolors.ENDC}')
-        self.get_water(obj, files)
-        del obj, files
-
-    def get_water(self,
-                  obj: relmp.ReadData,  # Atoms, bonds, ... from data file
-                  files: get_prompt.Prompts) -> None:
-        """get all the atoms and return water mols"""
-        water_df: pd.DataFrame  # water part in the dataframe
-        box: tuple[float, float, float]  # Length of the box in x, y, z
-        atom_type: list[int]  # List of the atoms type in the data file
-        param = rejs.ReadJson(files.jname)
-        atom_type = self.get_types(param.df, files.atoms)
-        water_df = self.get_water_df(obj.Atoms_df, atom_type)
-        box = self.get_box(obj)
-        water_df = self.fix_pbc(water_df, box)
-        self.get_angles(water_df)
-        del obj
-        return water_df
+class Water:
+    """helpers of the water styles (angle, hbond, tetrahedral): the types
+    of O and H, the O, H1, H2 of each molecule, unit vectors, and the
+    slabs along z
+    Each snapshot is cut into NSLAB slabs of its own box; the sums of a
+    value and of the molecules in each slab are kept with the lower z
+    and the length of the box, and the z of a slab is from their
+    averages."""
+    NSLAB: int = 50  # Number of the slabs along z
+
+    def init_slabs(self) -> None:
+        """set the sums of the slabs and of the box in z to zero"""
+        self.slab_sum = np.zeros(self.NSLAB)  # Sum of the value in slabs
+        self.slab_count = np.zeros(self.NSLAB, dtype=np.int64)  # Molecules
+        self.zlo_stat = stats.Welford()  # Lower z of the box
+        self.lz_stat = stats.Welford()  # Length of box in z
+
+    def z_fraction(self,
+                   z_coord: np.ndarray,  # z of the molecules
+                   zlim: list[float]  # lo and hi of the box in z
+                   ) -> np.ndarray:
+        """return z as a fraction of the box of the snapshot, in [0, 1)"""
+        return np.mod((z_coord - zlim[0]) / (zlim[1] - zlim[0]), 1.0)
+
+    def get_slabs(self,
+                  z_coord: np.ndarray,  # z of the molecules
+                  zlim: list[float],  # lo and hi of the box in z
+                  value: np.ndarray  # Value of each molecule
+                  ) -> dict[str, typing.Any]:
+        """return the sum of the value and the number of the molecules in
+        each slab of the snapshot, and its box in z"""
+        slab: np.ndarray = np.minimum(
+            (self.z_fraction(z_coord, zlim) * self.NSLAB).astype(np.int64),
+            self.NSLAB - 1)
+        return dict(slab_sum=np.bincount(slab, weights=value,
+                                         minlength=self.NSLAB),
+                    slab_count=np.bincount(slab, minlength=self.NSLAB),
+                    zlim=list(zlim))
+
+    def add_box(self,
+                zlim: list[float]  # lo and hi of the box in z
+                ) -> None:
+        """add the box of one snapshot to the sums"""
+        self.zlo_stat.add(zlim[0])
+        self.lz_stat.add(zlim[1] - zlim[0])
+
+    def add_slabs(self,
+                  values: dict[str, typing.Any]  # From `get_slabs`
+                  ) -> None:
+        """add the slabs of one snapshot to the sums"""
+        self.slab_sum += values['slab_sum']
+        self.slab_count += values['slab_count']
+        self.add_box(values['zlim'])
+
+    def z_slabs(self) -> np.ndarray:
+        """return the z of the middle of each slab in the average box"""
+        edges: np.ndarray = np.linspace(0.0, 1.0, self.NSLAB + 1)
+        return float(self.zlo_stat.mean) + \
+            0.5 * (edges[1:] + edges[:-1]) * float(self.lz_stat.mean)
+
+    def write_slabs(self,
+                    fname: str,  # Name of the output file
+                    header: str  # Names of the columns
+                    ) -> None:
+        """write the molecules and the average value of each slab"""
+        mean: np.ndarray = np.divide(
+            self.slab_sum, self.slab_count, out=np.zeros(self.NSLAB),
+            where=self.slab_count > 0)
+        np.savetxt(fname,
+                   np.column_stack((self.z_slabs(), self.slab_count /
+                                    max(self.nframes, 1), mean)),
+                   fmt=['%.4f', '%.4f', '%.4f'],
+                   header=f'{header}; frames: {self.nframes}')
+        print(f'{bcolors.OKCYAN}\tWrote: `{fname}`{bcolors.ENDC}')
 
     def get_types(self,
                   df: pd.DataFrame,  # DataFrame of the atoms' name and mass
-                  atoms: list[str]  # atoms in the input files (sys.argv[1])
+                  atoms: list[str],  # atoms in the input files (sys.argv[1])
+                  needed: tuple[str, ...] = ('O', 'H')  # Must be in atoms
                   ) -> list[int]:
         """return the type of each atom in info file"""
         param_atoms: list[str]  # Type of atoms in jname
@@ -56,9 +123,12 @@ class Angle:
         if not all(x in param_atoms for x in atoms):
             exit(f'\t{bcolors.FAIL}Error! There is no type for one or'
                  f' more of atoms: `{atoms}` in json file{bcolors.ENDC}\n')
+        if not all(x in atoms for x in needed):
+            exit(f'\t{bcolors.FAIL}Error! `{" ".join(needed)}` must be in'
+                 f' the atoms: `{" ".join(atoms)}`{bcolors.ENDC}\n')
         # This a messy way to do it but fine for now :))
         for atom in atoms:
-            i_type = int(df.loc[df['name'] == atom]['typ'])
+            i_type = int(df.loc[df['name'] == atom]['typ'].iloc[0])
             atom_types.append(i_type)
             if atom.casefold() == 'O'.casefold():
                 self.OXYGEN = i_type
@@ -66,99 +136,155 @@ class Angle:
                 self.HYDROGEN = i_type
         return atom_types
 
-    def get_water_df(self,
-                     df: pd.DataFrame,  # Atoms_df from main data to analysis
-                     atom_type: list[int]  # Type of each atom (for water)
-                     ) -> pd.DataFrame:
-        """get all the atoms and return water as a DataFrame"""
-        df_list: pd.DataFrame = []  # List of dataframe to get each type
-        # Get selected types information
-        for i_type in atom_type:
-            df_list.append(df.loc[(df['typ'] == i_type)])
-        water_df = pd.concat(df_list)
-        # Sort the dataframe
-        water_df.sort_values(by=['atom_id'], axis=0, inplace=True)
-        water_df.reset_index(inplace=True)
-        water_df.drop(['index'], inplace=True, axis=1)
-        del df, df_list
-        return water_df
-
-    def fix_pbc(self,
-                df: pd.DataFrame,  # All the water atoms coordinates
-                box: tuple[float, float, float]) -> pd.DataFrame:
-        """apply the correction of the periodic boundry condition
-        then, set the nx, ny, nz equal to zero"""
-        for i, row in df.iterrows():
-            if row['nx'] != 0:
-                df.iloc[i]['x'] += box[0]*row['nx']
-                df.iloc[i]['nx'] = 0
-            if row['ny'] != 0:
-                df.iloc[i]['y'] += box[1]*row['ny']
-                df.iloc[i]['ny'] = 0
-            if row['nz'] != 0:
-                df.iloc[i]['z'] += box[2]*row['nz']
-                df.iloc[i]['nz'] = 0
-        return df
-
-    def get_angles(self,
-                   df: pd.DataFrame  # All the water atoms coordinates
-                   ) -> None:
-        """return angle of the moles"""
-        # get the mols index list
-        mol_list: list[int]  # index for mols of the water molecules
-        mol_list = list(set(df['mol']))
-        angle_list: list[float] = []  # angles for each mol
-        for mol in mol_list:
-            row = df.loc[df['mol'] == mol]
-            angle_list.append(self.mk_vectors(row))
-        average_angles: float  # Average of angles of the data file
-        average_angles = np.sum(angle_list)/len(angle_list)
-        print(f'{bcolors.OKGREEN}\tAverage angle = '
-              f'{average_angles:.4f} [rad] '
-              f'(= {np.degrees(average_angles):.4f} [deg]){bcolors.ENDC}\n')
-        del df
-
-    def get_box(self,
-                obj: relmp.ReadData  # Atoms, bonds, ... from data file
-                ) -> tuple[float, float, float]:
-        """get the box length in x, y, z direction"""
-        boxx: float = np.abs(obj.Xlim[1] - obj.Xlim[0])  # length in x
-        boxy: float = np.abs(obj.Ylim[1] - obj.Ylim[0])  # length in y
-        boxz: float = np.abs(obj.Zlim[1] - obj.Zlim[0])  # length in z
-        del obj
-        return boxx, boxy, boxz
-
     def mk_vectors(self,
-                   df: pd.DataFrame  # One molecule of the water
-                   ) -> float:
-        """get each molecule, and return its angle"""
-        h_index = 1
-        for _, row in df.iterrows():
-            x, y, z = row['x'], row['y'], row['z']
-            if row['typ'] == self.OXYGEN:
-                orgin = np.array([x, y, z])
-            elif row['typ'] == self.HYDROGEN:
-                if h_index == 1:
-                    h1 = np.array([x, y, z])
-                    h_index += 1
-                else:
-                    h2 = np.array([x, y, z])
-        v1: np.array = orgin-h1  # vector from oxygen towards hydrogen
-        v2: np.array = orgin-h2  # vector from oxygen towards hydrogen
-        del df
-        return self.angle_between_vecs(v1, v2)
+                   water: atom_table.AtomTable  # All the water atoms
+                   ) -> tuple[np.ndarray, ...]:
+        """return the mols id and coordinates of O, H1 and H2 of all the
+        molecules, each as an array with one row per molecule
+        The atoms are sorted by mol, so in each molecule the first
+        hydrogen is H1 and the second one is H2"""
+        order: np.ndarray = water.mol_index.order
+        mol: np.ndarray = water.mol[order]
+        typ: np.ndarray = water.typ[order]
+        xyz: np.ndarray = water.xyz[order].astype(np.float64)
+        o_mask: np.ndarray = typ == self.OXYGEN
+        h_mask: np.ndarray = typ == self.HYDROGEN
+        o_mol: np.ndarray = mol[o_mask]
+        h_mol: np.ndarray = mol[h_mask]
+        if len(h_mol) != 2 * len(o_mol) or \
+           not np.array_equal(h_mol[0::2], o_mol) or \
+           not np.array_equal(h_mol[1::2], o_mol):
+            exit(f'\t{bcolors.FAIL}Error! Water molecules must have one '
+                 f'`O` and two `H` atoms{bcolors.ENDC}\n')
+        orgin: np.ndarray = xyz[o_mask]
+        h1: np.ndarray = xyz[h_mask][0::2]
+        h2: np.ndarray = xyz[h_mask][1::2]
+        del water
+        return o_mol, orgin, h1, h2
 
     def unit_vector(self,
-                    vector: np.array  # Any 1\times 2 array as a vector
-                    ) -> np.array:
-        """ Returns the unit vector of the vector.  """
-        return vector / np.linalg.norm(vector)
+                    vector: np.ndarray  # Vectors, one in each row (Nx3)
+                    ) -> np.ndarray:
+        """ Returns the unit vectors of the vectors.  """
+        return vector / np.linalg.norm(vector, axis=-1, keepdims=True)
 
     def angle_between_vecs(self,
-                           v1: np.array,  # vector from oxygen towards hydrogen
-                           v2: np.array  # vector from oxygen towards hydrogen
-                           ) -> float:
-        """ Returns the angle in radians between vectors 'v1' and 'v2'"""
-        v1_u: np.array = self.unit_vector(v1)
-        v2_u: np.array = self.unit_vector(v2)
-        return np.arccos(np.clip(np.dot(v1_u, v2_u), -1.0, 1.0))
+                           v1: np.ndarray,  # vectors from oxygen towards H1
+                           v2: np.ndarray  # vectors from oxygen towards H2
+                           ) -> np.ndarray:
+        """ Returns the angles in radians between rows of 'v1' and 'v2'"""
+        v1_u: np.ndarray = self.unit_vector(v1)
+        v2_u: np.ndarray = self.unit_vector(v2)
+        return np.arccos(np.clip(np.einsum('ij,ij->i', v1_u, v2_u),
+                                 -1.0, 1.0))
+
+
+class Angle(Water):
+    """get data and calculate the orientation for water"""
+    NCOS: int = 40  # Number of the bins of cos(theta)
+
+    def __init__(self,
+                 files: get_prompt.Prompts) -> None:
+        print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
+              f'\tGetting water molecules{bcolors.ENDC}')
+        param = rejs.ReadJson(files.jname)
+        self.atom_type: list[int]  # List of the atoms type in the data file
+        self.atom_type = self.get_types(param.df, files.atoms)
+        self.types: list[int] = self.atom_type  # Atoms to read
+        self.nframes: int = 0  # Number of the frames
+        self.angle_stat = stats.Welford()  # Angles of all the molecules
+        self.angle_frames = stats.BlockAverage()  # Mean angle of frames
+        self.init_slabs()
+        # Slab (as fraction of the box in z) x cos(theta)
+        self.dipole_hist = stats.Histogram((self.NSLAB, self.NCOS),
+                                           ((0.0, 1.0), (-1.0, 1.0)))
+        self.oh_hist = stats.Histogram((self.NSLAB, self.NCOS),
+                                       ((0.0, 1.0), (-1.0, 1.0)))
+        del files
+
+    def analyse(self,
+                obj: relmp.ReadData  # Data file or a frame of trajectory
+                ) -> dict[str, typing.Any]:
+        """return the angles and the histograms of the orientations of
+        the water in this snapshot"""
+        water: atom_table.AtomTable  # water atoms of the snapshot
+        water = pbc.get_whole(obj, self.atom_type)
+        values: dict[str, typing.Any] = dict()  # Values of the snapshot
+        values['mols'], orgin, h1, h2 = self.mk_vectors(water)
+        values['angles'] = self.get_angles(orgin, h1, h2)
+        values.update(self.get_profiles(orgin, h1, h2, obj.Zlim))
+        del obj
+        return values
+
+    def accumulate(self,
+                   values: dict[str, typing.Any]  # From `analyse`
+                   ) -> None:
+        """add the values of one snapshot to the sums"""
+        self.mols, self.angles = values['mols'], values['angles']
+        self.angle_stat.add_batch(self.angles)
+        self.angle_frames.add(np.mean(self.angles))
+        self.dipole_hist.merge(values['dipole_hist'])
+        self.oh_hist.merge(values['oh_hist'])
+        self.add_box(values['zlim'])
+        self.nframes += 1
+
+    def get_angles(self,
+                   orgin: np.ndarray,  # Coordinates of O of all the mols
+                   h1: np.ndarray,  # Coordinates of H1 of all the mols
+                   h2: np.ndarray  # Coordinates of H2 of all the mols
+                   ) -> np.ndarray:
+        """return the HOH angle of all the molecules"""
+        angles: np.ndarray  # HOH angle of each molecule
+        angles = self.angle_between_vecs(orgin - h1, orgin - h2)
+        return angles
+
+    def get_profiles(self,
+                     orgin: np.ndarray,  # Coordinates of O of all the mols
+                     h1: np.ndarray,  # Coordinates of H1 of all the mols
+                     h2: np.ndarray,  # Coordinates of H2 of all the mols
+                     zlim: list[float]  # lo and hi of the box in z
+                     ) -> dict[str, typing.Any]:
+        """return the histograms of the dipole and OH orientations in
+        each slab along z"""
+        z_frac: np.ndarray  # z of each molecule as fraction of the box
+        dipole: np.ndarray = 0.5 * (h1 + h2) - orgin
+        oh: np.ndarray = np.vstack((h1 - orgin, h2 - orgin))
+        z_frac = self.z_fraction(orgin[:, 2], zlim)
+        dipole_hist = stats.Histogram(self.dipole_hist.bins,
+                                      self.dipole_hist.ranges)
+        oh_hist = stats.Histogram(self.oh_hist.bins, self.oh_hist.ranges)
+        dipole_hist.add(z_frac, self.unit_vector(dipole)[:, 2])
+        oh_hist.add(np.tile(z_frac, 2), self.unit_vector(oh)[:, 2])
+        return dict(dipole_hist=dipole_hist, oh_hist=oh_hist,
+                    zlim=list(zlim))
+
+    def print_results(self) -> None:
+        """print the average angle and write the histograms"""
+        average_angles: float  # Average of angles of all the frames
+        error: float  # Standard error of the average from the frames
+        average_angles = float(self.angle_stat.mean)
+        error = self.angle_frames.sem
+        print(f'{bcolors.OKGREEN}\tNumber of frames = {self.nframes}\n'
+              f'\tAverage angle = '
+              f'{average_angles:.4f} +/- {stats.error_text(error)} [rad] '
+              f'(= {np.degrees(average_angles):.4f} +/- '
+              f'{stats.error_text(np.degrees(error))} [deg])\n'
+              f'\tStd of angles = {np.degrees(self.angle_stat.std):.4f} '
+              f'[deg]{bcolors.ENDC}\n')
+        self.write_hist('water_dipole.txt', self.dipole_hist)
+        self.write_hist('water_oh.txt', self.oh_hist)
+
+    def write_hist(self,
+                   fname: str,  # Name of the output file
+                   hist: stats.Histogram  # Histogram of slab x cos
+                   ) -> None:
+        """write the histogram, a row for each bin"""
+        z_col, cos_col = np.meshgrid(self.z_slabs(), hist.centers(1),
+                                     indexing='ij')
+        np.savetxt(fname,
+                   np.column_stack((z_col.ravel(), cos_col.ravel(),
+                                    hist.counts.ravel())),
+                   fmt=['%.4f', '%.4f', '%d'],
+                   header=f'z [A], cos(theta), count; '
+                          f'frames: {self.nframes}')
+        print(f'{bcolors.OKCYAN}\tWrote: `{fname}`{bcolors.ENDC}')
@@ -0,0 +1,206 @@
+import typing
+import functools
+import numpy as np
+import pandas as pd
+
+
+class Doc:
+    """compact table of the atoms for all the analyses
+    Every column is a typed numpy array:
+        atom_id, mol, typ: int32
+        xyz: float64 (or float32 to save memory), one row for each atom
+        images: int16, image flags (nx, ny, nz) of each atom
+        has_images: if the image flags were read, or the coordinates
+            are unwrapped; otherwise the flags are zero and molecules on
+            the edge of the box must be made whole by the minimum image
+        charge: float64, if there are charges
+        extra: other float columns, e.g., velocities from dump files
+    The name of the atoms are kept once for each type (`Names`) and not
+    for each atom. It takes about 50 bytes for each atom (38 with
+    float32 coordinates).
+    The molecules are indexed once (MolIndex, like a CSR matrix): the
+    rows sorted by mol and atom id, and the offset and number of atoms
+    of each molecule in them. Every per-molecule sum is then one
+    `np.add.reduceat` and the atoms of a molecule are one slice.
+    The readers can keep only some of the atoms (keep_lines), by their
+    type or z, before the numbers of the lines are parsed.
+    """
+
+
+def keep_lines(lines: list[str],  # Lines of the atoms, one for each atom
+               typ_col: int,  # Column of the type in the lines
+               types: typing.Union[list[int], None] = None,  # Wanted types
+               z_col: int = -1,  # Column of the z in the lines
+               zrange: typing.Union[tuple[float, float], None] = None
+               ) -> list[str]:
+    """return only the lines of the wanted atoms
+    Only the type (and z) token of each line is looked at, the rest of
+    the line is parsed later just for the lines which are kept. zrange
+    is lo <= z < hi in the units of the z column."""
+    if types is None and zrange is None:
+        return lines
+    wanted: set[str] = set()  # Types as they are written in the lines
+    if types is not None:
+        wanted = {str(int(item)) for item in types}
+    nsplit: int = max(typ_col, z_col) + 1
+    kept: list[str] = []  # Lines of the wanted atoms
+    for line in lines:
+        tokens: list[str] = line.split(None, nsplit)
+        if types is not None and tokens[typ_col] not in wanted:
+            continue
+        if zrange is not None and \
+           not zrange[0] <= float(tokens[z_col]) < zrange[1]:
+            continue
+        kept.append(line)
+    return kept
+
+
+class MolIndex:
+    """rows of the atoms of each molecule
+    order: rows of the table sorted by mol, then by atom id
+    mols: id of each molecule, ascending
+    offsets: start of each molecule in `order` and the end (M+1)
+    counts: number of atoms in each molecule
+    """
+    def __init__(self,
+                 order: np.ndarray,  # Rows sorted by mol and atom id
+                 mol: np.ndarray  # Molecule of each row, in that order
+                 ) -> None:
+        self.order: np.ndarray = order
+        new: np.ndarray = np.ones(len(mol), dtype=bool)  # First of a mol
+        new[1:] = mol[1:] != mol[:-1]
+        starts: np.ndarray = np.flatnonzero(new)
+        self.mols: np.ndarray = mol[starts]
+        self.offsets: np.ndarray = np.append(starts, len(mol))
+        self.counts: np.ndarray = np.diff(self.offsets)
+
+    def __len__(self) -> int:
+        return len(self.mols)
+
+    @property
+    def starts(self) -> np.ndarray:
+        return self.offsets[:-1]
+
+    def rows(self,
+             i: int  # Index of the molecule
+             ) -> np.ndarray:
+        """rows of the atoms of the i-th molecule"""
+        return self.order[self.offsets[i]:self.offsets[i + 1]]
+
+    def reduce(self,
+               values: np.ndarray  # Values of the atoms, in mol order
+               ) -> np.ndarray:
+        """sum of the values over the atoms of each molecule"""
+        return np.add.reduceat(values, self.starts, axis=0)
+
+    def repeat(self,
+               values: np.ndarray  # One value for each molecule
+               ) -> np.ndarray:
+        """the value of each molecule for all its atoms, in mol order"""
+        return np.repeat(values, self.counts, axis=0)
+
+
+class AtomTable:
+    """typed columns of the atoms"""
+    def __init__(self,
+                 atom_id: np.ndarray,  # Id of the atoms
+                 mol: np.ndarray,  # Molecule of the atoms
+                 typ: np.ndarray,  # Type of the atoms
+                 xyz: np.ndarray,  # Coordinates, one row for each atom
+                 images: typing.Union[np.ndarray, None] = None,  # nx ny nz
+                 charge: typing.Union[np.ndarray, None] = None,  # Charges
+                 names: typing.Union[dict[int, str], None] = None,  # By type
+                 extra: typing.Union[dict[str, np.ndarray], None] = None,
+                 dtype: type = np.float64,  # Type of the coordinates
+                 has_images: bool = False  # Flags read or xyz unwrapped
+                 ) -> None:
+        self.atom_id: np.ndarray = np.asarray(atom_id, dtype=np.int32)
+        self.mol: np.ndarray = np.asarray(mol, dtype=np.int32)
+        self.typ: np.ndarray = np.asarray(typ, dtype=np.int32)
+        self.xyz: np.ndarray = np.ascontiguousarray(xyz, dtype=dtype)
+        if images is None:
+            images = np.zeros((len(self.atom_id), 3))
+        self.images: np.ndarray = np.asarray(images, dtype=np.int16)
+        self.has_images: bool = has_images
+        self.charge: typing.Union[np.ndarray, None] = None
+        if charge is not None:
+            self.charge = np.asarray(charge, dtype=np.float64)
+        self.Names: dict[int, str] = dict(names) if names else dict()
+        self.extra: dict[str, np.ndarray] = dict(extra) if extra else dict()
+
+    def __len__(self) -> int:
+        return len(self.atom_id)
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.xyz[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.xyz[:, 1]
+
+    @property
+    def z(self) -> np.ndarray:
+        return self.xyz[:, 2]
+
+    def take(self,
+             index: np.ndarray  # Index or mask of the wanted atoms
+             ) -> 'AtomTable':
+        """return a new table with only the given rows"""
+        return AtomTable(self.atom_id[index],
+                         self.mol[index],
+                         self.typ[index],
+                         self.xyz[index],
+                         self.images[index],
+                         None if self.charge is None else self.charge[index],
+                         self.Names,
+                         {k: v[index] for k, v in self.extra.items()},
+                         self.xyz.dtype,
+                         self.has_images)
+
+    def select(self,
+               types: list[int]  # Types of the wanted atoms
+               ) -> 'AtomTable':
+        """return a new table with only the atoms of these types, the
+        rows are in mol order so its index needs no sorting"""
+        order: np.ndarray = self.mol_index.order
+        return self.take(order[np.isin(self.typ[order], types)])
+
+    @functools.cached_property
+    def mol_index(self) -> MolIndex:
+        """index of the molecules, made at the first use"""
+        order: np.ndarray = self.mol_order()
+        return MolIndex(order, self.mol[order])
+
+    def mol_order(self) -> np.ndarray:
+        """index which sorts the atoms by mol, then by atom id"""
+        if 'mol_index' in self.__dict__:
+            return self.mol_index.order
+        d_mol: np.ndarray = np.diff(self.mol)
+        if np.all((d_mol > 0) | ((d_mol == 0) & (np.diff(self.atom_id) > 0))):
+            return np.arange(len(self))
+        return np.lexsort((self.atom_id, self.mol))
+
+    def names(self) -> np.ndarray:
+        """name of each atom, made from the names of the types"""
+        lookup: np.ndarray = np.array(
+            [self.Names.get(i, '') for i in range(self.typ.max() + 1)],
+            dtype=object) if len(self) else np.array([], dtype=object)
+        return lookup[self.typ]
+
+    def to_df(self) -> pd.DataFrame:
+        """return the atoms as a DataFrame, e.g., to write them out"""
+        df: pd.DataFrame = pd.DataFrame({'atom_id': self.atom_id,
+                                         'mol': self.mol,
+                                         'typ': self.typ})
+        if self.charge is not None:
+            df['charge'] = self.charge
+        df['x'], df['y'], df['z'] = self.x, self.y, self.z
+        df['nx'], df['ny'], df['nz'] = \
+            self.images[:, 0], self.images[:, 1], self.images[:, 2]
+        for key, value in self.extra.items():
+            df[key] = value
+        if self.Names:
+            df['name'] = self.names()
+        df.index = self.atom_id
+        return df
@@ -0,0 +1,147 @@
+import typing
+import numpy as np
+import pandas as pd
+import pbc
+import get_prompt
+import read_json as rejs
+import read_lmp_data as relmp
+from colors_text import TextColor as bcolors
+
+
+class Doc:
+    """density profile of each type of the atoms along an axis
+    The types are the names in the `atoms` key. The box is cut into
+    NBINS slabs along the axis (x, y or z, default z), and the atoms of
+    all the types are counted in the slabs of each snapshot at once with
+    one `np.bincount` over (type, slab):
+        rho(type, slab) = sum(w) / (A dl)
+    where A is the area of the box normal to the axis and dl the width
+    of the slab of that snapshot, so a box which changes (NPT) is fine.
+    With `weight = mass` w is the mass of the atom and the profile is
+    in g/cm^3; the masses are from the Masses section of the data file,
+    or from the JSON file for a trajectory. Otherwise w is one and the
+    profile is in 1/A^3.
+    The coordinates are only wrapped into the box; there is no search
+    or molecule in it, so it is as fast as the frames are read.
+    Output:
+        Average density of each type over the box
+        density.txt: coordinate of the slab, density of each type, and
+            the total
+    """
+
+
+class Density:
+    """accumulate the density profiles of the types over the frames"""
+    NBINS: int = 100  # Number of the slabs along the axis
+    AMU_A3: float = 1.66053907  # amu/A^3 to g/cm^3
+    AXES: str = 'xyz'  # Name of the axes
+
+    def __init__(self,
+                 files: get_prompt.Prompts  # All the infos in the prompt file
+                 ) -> None:
+        print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
+              f'\tGetting density profiles{bcolors.ENDC}')
+        param = rejs.ReadJson(files.jname)  # Name of atoms in the JSON file
+        self.atoms_type: dict[str, int]  # Name and type of the atoms
+        self.atoms_type = self.get_types(param.df, files.atoms)
+        self.types: list[int] = list(self.atoms_type.values())
+        self.axis: int = files.axis  # Index of the axis of the profile
+        self.mass: bool = files.weight == 'mass'  # Mass or number density
+        self.json_masses: typing.Union[np.ndarray, None] = \
+            param.get_masses()
+        # Column of each type in the profile, -1 for other types
+        self.column: np.ndarray = np.full(max(self.types) + 1, -1,
+                                          dtype=np.int64)
+        self.column[self.types] = np.arange(len(self.types))
+        self.nframes: int = 0  # Number of the frames
+        self.rho = np.zeros((len(self.types), self.NBINS))  # Sum of rho
+        self.lo_sum: float = 0.0  # Sum of the lower bound of the axis
+        self.length_sum: float = 0.0  # Sum of the length of the axis
+        del files
+
+    def get_types(self,
+                  df: pd.DataFrame,  # Name and type of atoms in JSON file
+                  atoms: list[str]  # Name of the atoms from the input
+                  ) -> dict[str, int]:
+        """find the int number for each atom in the json file"""
+        param_atoms: list[str] = list(df['name'])  # Type of atoms in jname
+        if not all(x in param_atoms for x in atoms):
+            exit(f'\t{bcolors.FAIL}Error! There is no type for one or'
+                 f' more of atoms: `{atoms}` in json file{bcolors.ENDC}\n')
+        return {atom: int(df.loc[df['name'] == atom]['typ'].iloc[0])
+                for atom in atoms}
+
+    def get_masses(self,
+                   obj: relmp.ReadData  # Data file or a frame of trajectory
+                   ) -> np.ndarray:
+        """return the mass of each type of the profile, from Masses of
+        the data file or, for a frame, from the JSON file"""
+        typ: np.ndarray = np.asarray(self.types, dtype=np.int64)
+        if hasattr(obj, 'Masses_df'):
+            masses: pd.Series = obj.Masses_df.set_index('typ')['mass']
+            return masses.loc[typ].to_numpy(dtype=np.float64)
+        if self.json_masses is None:
+            exit(f'\t{bcolors.FAIL}Error! There are no masses for the '
+                 f'mass density in the input{bcolors.ENDC}\n')
+        return self.json_masses[typ]
+
+    def analyse(self,
+                obj: relmp.ReadData  # Data file or a frame of trajectory
+                ) -> dict[str, typing.Any]:
+        """return the density profile of each type of the snapshot"""
+        box: np.ndarray = pbc.get_box(obj)  # Length of the box in x, y, z
+        lim: list[float] = \
+            list((obj.Xlim, obj.Ylim, obj.Zlim)[self.axis])
+        typ: np.ndarray = obj.atoms.typ.astype(np.int64)
+        column: np.ndarray = np.full(len(typ), -1, dtype=np.int64)
+        known: np.ndarray = typ < len(self.column)
+        column[known] = self.column[typ[known]]
+        inside: np.ndarray = column >= 0
+        coord: np.ndarray = \
+            obj.atoms.xyz[inside, self.axis].astype(np.float64)
+        slab: np.ndarray = np.minimum(
+            (np.mod((coord - lim[0]) / box[self.axis], 1.0) *
+             self.NBINS).astype(np.int64), self.NBINS - 1)
+        counts: np.ndarray = np.bincount(
+            column[inside] * self.NBINS + slab,
+            minlength=len(self.types) * self.NBINS
+            ).reshape(len(self.types), self.NBINS).astype(np.float64)
+        volume: float = float(np.prod(box)) / self.NBINS  # Of a slab
+        rho: np.ndarray = counts / volume
+        if self.mass:
+            rho *= self.get_masses(obj)[:, None] * self.AMU_A3
+        return dict(rho=rho, lim=lim)
+
+    def accumulate(self,
+                   values: dict[str, typing.Any]  # From `analyse`
+                   ) -> None:
+        """add the profiles of one snapshot to the sums"""
+        self.rho += values['rho']
+        self.lo_sum += values['lim'][0]
+        self.length_sum += values['lim'][1] - values['lim'][0]
+        self.nframes += 1
+
+    def print_results(self,
+                      fname: str = 'density.txt'  # Name of the output file
+                      ) -> None:
+        """print the average density of each type and write profiles"""
+        nframes: int = max(self.nframes, 1)
+        rho: np.ndarray = self.rho / nframes
+        length: float = self.length_sum / nframes
+        coord: np.ndarray = self.lo_sum / nframes + \
+            (np.arange(self.NBINS) + 0.5) * length / self.NBINS
+        unit: str = 'g/cm^3' if self.mass else '1/A^3'
+        names: list[str] = list(self.atoms_type)
+        np.savetxt(fname,
+                   np.column_stack((coord, rho.T, rho.sum(axis=0))),
+                   fmt=['%.4f'] + ['%.6e'] * (len(names) + 1),
+                   header=f'{self.AXES[self.axis]} [A], '
+                          f'{", ".join(names)}, total [{unit}]; '
+                          f'frames: {self.nframes}')
+        print(f'{bcolors.OKGREEN}\tNumber of frames = {self.nframes}')
+        for name, profile in zip(names, rho):
+            print(f'\tAverage density of {name} = '
+                  f'{profile.mean():.6e} [{unit}]')
+        print(f'\tAverage total density = {rho.sum(axis=0).mean():.6e} '
+              f'[{unit}]{bcolors.ENDC}')
+        print(f'{bcolors.OKCYAN}\tWrote: `{fname}`{bcolors.ENDC}\n')
@@ -19,10 +19,50 @@ class Doc:
         angle: Calculate the HOH angle for water molecules.
         gyration: Calculate the gyration radius of the decane or
         surfactants.
-    if style is gyration then there must be a key:
+        order: Calculate the nematic order parameter of the decane or
+        surfactants.
+        rdf: Calculate the radial distribution function g(r) and the
+        coordination number of the names in `atoms` (one name: with
+        itself, two names: the second one around the first one).
+        hbond: Calculate the hydrogen bonds between the water molecules
+        (atoms = O H), their profile along z and their lifetimes.
+        tetrahedral: Calculate the tetrahedral order parameter q of the
+        water oxygens (atoms = O) and its profile along z.
+        density: Calculate the number (or with `weight = mass`, the
+        mass) density profile of each name in `atoms` along an axis.
+    if style is order with the end-to-end vectors (vector = tails, the
+    default) then there must be a key:
         tails = CH3
-        it is needed for calculating the radius of gyration and it must
-        be in the `atoms` key
+        it is the atom at the ends of the chains and it must be in the
+        `atoms` key
+    for gyration the atoms can be weighted by their masses, and for
+    density the mass density is given instead of the number density,
+    with (default none):
+        weight = mass
+    for order, the vectors along the chains are chosen with (default
+    tails, end-to-end vectors; segment, C(i) -> C(i+2) vectors):
+        vector = segment
+    for density, the profile is along this axis (default z):
+        axis = x
+    for trajectories (dump or lammpstrj) the frames to analysis can be
+    selected as a python slice (start:stop:step), e.g., every 10th
+    frame of the last 100 frames:
+        frames = -100::10
+    a data file is read once and kept in a binary cache next to it for
+    the next runs (default yes); with no, only the atoms of the `atoms`
+    key are parsed from the text, which needs less memory:
+        cache = no
+    data files (and trajectories, frame by frame) can be read by more
+    than one process (default 1); the results are the same:
+        nworkers = 4
+    the largest distance of the pairs, in A, for rdf (default 10) and
+    the largest O...O distance for hbond (default 3.5), and the
+    cutoff to find the 4 nearest oxygens for tetrahedral (default 5):
+        cutoff = 12.0
+    and with more than one worker, the frames can be read once into a
+    ring of shared memory blocks, for this number of frames, and the
+    workers look at them there (default 0, each worker reads frames):
+        buffers = 8
     JSON file MUST have JSON extension, and the combination script wr-
     ites it. It contains the name, type, and mass of each atom.
     The data file must have one of the following extensions:
@@ -52,6 +92,15 @@ class Prompts:
         info_dict = self.read_infos(fname)
         style, files = info_dict['style'], info_dict['files']
         self.tails, atoms = info_dict['tails'], info_dict['atoms']
+        self.frames: slice = self.get_frames(info_dict['frames'])
+        self.weight: str = self.get_weight(info_dict['weight'])
+        self.vector: str = self.get_vector(info_dict['vector'])
+        self.axis: int = self.get_axis(info_dict['axis'])
+        self.cache: bool = self.get_cache(info_dict['cache'])
+        self.nworkers: int = self.get_nworkers(info_dict['nworkers'])
+        self.buffers: int = self.get_buffers(info_dict['buffers'])
+        self.cutoff: typing.Union[float, None] = \
+            self.get_cutoff(info_dict['cutoff'])
         self.fname, self.jname = self.check_extensions(files)
         self.style = self.get_style(style)
         self.atoms = self.get_atoms(atoms)
@@ -60,7 +109,8 @@ class Prompts:
               f'\tdata:\t  `{self.fname}`\n'
               f'\tparamter: `{self.jname}`\n'
               f'\tatoms:\t  `{" & ".join(self.atoms)}`\n'
-              f'\ttails:\t  `{self.tails}`'
+              f'\ttails:\t  `{self.tails}`\n'
+              f'\tframes:\t  `{info_dict["frames"]}`'
               f'{bcolors.ENDC}\n')
 
     def check_infos(self) -> str:
@@ -88,7 +138,15 @@ class Prompts:
         line: str  # Each line of the file
         style: str  # The style of the calculation
         atoms: str  # The name of the atoms to be consider
-        tails: str = 'None'  # The name of the tail atom for radius of gyration
+        tails: str = 'None'  # The name of the tail atom for order
+        frames: str = ':'  # Selected frames of the trajectory as a slice
+        weight: str = 'none'  # Weight of the atoms in gyration
+        vector: str = 'tails'  # Vectors along the chains for order
+        axis: str = 'z'  # Axis of the density profile
+        cache: str = 'yes'  # Keep the data file in a binary cache
+        nworkers: str = '1'  # Number of the processes
+        buffers: str = '0'  # Frames in the shared memory ring
+        cutoff: str = 'none'  # Largest distance of the pairs
         files: list[str] = []  # To save the input files
         return_dict: dict[str, typing.Any] = dict()  # Return keys and values
         atoms_flag: bool = False  # Check if there are atoms defeind
@@ -113,8 +171,24 @@ class Prompts:
                     return_dict['atoms'] = atoms
                     atoms_flag = True
                 elif line.strip().startswith('tails'):
-                    tails = line.split('=')[1].strip()
+                    tails = line.split('=')[1].strip().upper()
                     tails_flage = True
+                elif line.strip().startswith('frames'):
+                    frames = line.split('=')[1].strip()
+                elif line.strip().startswith('weight'):
+                    weight = line.split('=')[1].strip()
+                elif line.strip().startswith('vector'):
+                    vector = line.split('=')[1].strip()
+                elif line.strip().startswith('axis'):
+                    axis = line.split('=')[1].strip()
+                elif line.strip().startswith('cache'):
+                    cache = line.split('=')[1].strip()
+                elif line.strip().startswith('nworkers'):
+                    nworkers = line.split('=')[1].strip()
+                elif line.strip().startswith('buffers'):
+                    buffers = line.split('=')[1].strip()
+                elif line.strip().startswith('cutoff'):
+                    cutoff = line.split('=')[1].strip()
                 else:
                     if line.strip():
                         print(f'\t{bcolors.WARNING}Warning: Undefined '
@@ -130,16 +204,24 @@ class Prompts:
                      f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
         files = self.check_files(files)
         return_dict['files'] = files
-        if style == 'gyration':
+        if style == 'order' and vector == 'tails':
             if not tails_flage:
                 exit(f'\t{bcolors.FAIL}Error! Name of the tail atom(s) needed.'
                      f'{bcolors.ENDC}\n'
                      f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
-            elif tails not in atoms.strip().split(' '):
+            elif tails not in atoms.strip().upper().split():
                 exit(f'\t{bcolors.FAIL}Error! `tails` atom(s): `{tails}`'
                      f' did not found in atoms: `{atoms}`.{bcolors.ENDC}\n'
                      f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
         return_dict['tails'] = tails
+        return_dict['frames'] = frames
+        return_dict['weight'] = weight
+        return_dict['vector'] = vector
+        return_dict['axis'] = axis
+        return_dict['cache'] = cache
+        return_dict['nworkers'] = nworkers
+        return_dict['buffers'] = buffers
+        return_dict['cutoff'] = cutoff
         return return_dict
 
     def get_style(self,
@@ -147,7 +229,8 @@ class Prompts:
                   ) -> str:
         """get the style of the caculation"""
         l_styles: list[str]  # List of available styles
-        l_styles = ['angle', 'gyration']
+        l_styles = ['angle', 'gyration', 'order', 'rdf', 'hbond',
+                    'tetrahedral', 'density']
         if style and style in l_styles:
             pass
         else:
@@ -156,6 +239,104 @@ class Prompts:
                  f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
         return style
 
+    def get_frames(self,
+                   frames: str  # Selected frames as `start:stop:step`
+                   ) -> slice:
+        """return the selected frames as a slice"""
+        items: list[str] = frames.split(':')
+        try:
+            if len(items) > 3:
+                raise ValueError
+            return slice(*[int(item) if item.strip() else None
+                           for item in items])
+        except ValueError:
+            exit(f'{bcolors.FAIL}\tError! The selected frames: `{frames}`'
+                 f' is not valid, it must be as `start:stop:step`'
+                 f'{bcolors.ENDC}\n'
+                 f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
+
+    def get_weight(self,
+                   weight: str  # The weight written in the info file
+                   ) -> str:
+        """get the weight of the atoms"""
+        l_weights: list[str] = ['none', 'mass']  # List of available weights
+        if weight not in l_weights:
+            exit(f'{bcolors.FAIL}\tError! The selected weight: `{weight}`'
+                 f' is not valid, choose from: {l_weights}{bcolors.ENDC}\n'
+                 f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
+        return weight
+
+    def get_vector(self,
+                   vector: str  # The vector written in the info file
+                   ) -> str:
+        """get the kind of vectors along the chains"""
+        l_vectors: list[str] = ['tails', 'segment']  # Available vectors
+        if vector not in l_vectors:
+            exit(f'{bcolors.FAIL}\tError! The selected vector: `{vector}`'
+                 f' is not valid, choose from: {l_vectors}{bcolors.ENDC}\n'
+                 f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
+        return vector
+
+    def get_axis(self,
+                 axis: str  # The axis written in the info file
+                 ) -> int:
+        """get the index of the axis of the profile"""
+        l_axes: list[str] = ['x', 'y', 'z']  # Available axes
+        if axis not in l_axes:
+            exit(f'{bcolors.FAIL}\tError! The selected axis: `{axis}`'
+                 f' is not valid, choose from: {l_axes}{bcolors.ENDC}\n'
+                 f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
+        return l_axes.index(axis)
+
+    def get_cache(self,
+                  cache: str  # The cache written in the info file
+                  ) -> bool:
+        """if the data file must be cached"""
+        l_caches: list[str] = ['yes', 'no']  # Available values
+        if cache not in l_caches:
+            exit(f'{bcolors.FAIL}\tError! The selected cache: `{cache}`'
+                 f' is not valid, choose from: {l_caches}{bcolors.ENDC}\n'
+                 f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
+        return cache == 'yes'
+
+    def get_nworkers(self,
+                     nworkers: str  # The nworkers written in the info file
+                     ) -> int:
+        """get the number of the processes"""
+        if not nworkers.isdigit() or int(nworkers) < 1:
+            exit(f'{bcolors.FAIL}\tError! The selected nworkers: '
+                 f'`{nworkers}` is not valid, it must be a positive '
+                 f'integer{bcolors.ENDC}\n'
+                 f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
+        return int(nworkers)
+
+    def get_buffers(self,
+                    buffers: str  # The buffers written in the info file
+                    ) -> int:
+        """get the number of the frames in the shared memory ring"""
+        if not buffers.isdigit():
+            exit(f'{bcolors.FAIL}\tError! The selected buffers: '
+                 f'`{buffers}` is not valid, it must be zero or a positive '
+                 f'integer{bcolors.ENDC}\n'
+                 f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
+        return int(buffers)
+
+    def get_cutoff(self,
+                   cutoff: str  # The cutoff written in the info file
+                   ) -> typing.Union[float, None]:
+        """get the cutoff of the pairs, None for the style's default"""
+        if cutoff == 'none':
+            return None
+        try:
+            if float(cutoff) <= 0:
+                raise ValueError
+            return float(cutoff)
+        except ValueError:
+            exit(f'{bcolors.FAIL}\tError! The selected cutoff: `{cutoff}`'
+                 f' is not valid, it must be a positive number'
+                 f'{bcolors.ENDC}\n'
+                 f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
+
     def check_files(self,
                     f_list: list[str]  # File names in info file
                     ) -> list[str]:
@@ -1,5 +1,9 @@
+import typing
 import numpy as np
 import pandas as pd
+import pbc
+import stats
+import atom_table
 import get_prompt
 import read_json as rejs
 import read_lmp_data as relmp
@@ -11,13 +15,36 @@ class Doc:
     based on:
         https://en.wikipedia.org/wiki/Radius_of_gyration
 
-    This script is only for a single snapshot (data from write_data)
+    It is for a single snapshot (data from write_data) or the frames
+    of a trajectory, which are added one by one
     Radius of gyration or R for polymer contain N atom:
 
         R^2 = (1/N)sum(\abs({r_k - r_{mean}}))^2
 
+    With `weight = mass` in the input file, the atoms are weighted by
+    their masses (from the data file, or the JSON file for frames):
+
+        R^2 = sum(m_k \abs({r_k - r_{com}})^2) / sum(m_k)
+
+    All the chains are done at once: the atoms are sorted by mol and
+    the sums of each chain are taken over its slice of the arrays.
+
+    The gyration tensor of each chain is computed in the same pass:
+
+        S_ab = sum(m_k (r_k,a - r_com,a)(r_k,b - r_com,b)) / sum(m_k)
+
+    and R^2 is its trace. With its eigenvalues l1 <= l2 <= l3:
+        asphericity: b = l3 - (l1 + l2)/2
+        acylindricity: c = l2 - l1
+        relative shape anisotropy: k^2 = 3/2 (l1^2+l2^2+l3^2)/R^4 - 1/2
+    The tensor is the same as `compute gyration/molecule tensor` in
+    LAMMPS (with mass weighting).
+
     Input:
         Polymer chain coordinates from read_lammps
+    Output:
+        Radius of gyration, gyration tensor and shape descriptors of
+        each chain and their statistics
     LAMMPS also calculate this property, but in a bit different way!
 
     """
@@ -26,34 +53,66 @@ class Doc:
 class RadiusGyration:
     """find the gyration of the input"""
     def __init__(self,
-                 obj: relmp.ReadData,  # All the infos in the data file
                  files: get_prompt.Prompts  # All the infos in the prompt file
                  ) -> None:
         print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
               f'\tGetting chain molecules{bcolors.ENDC}')
-        self.gyration(obj, files)
+        param = rejs.ReadJson(files.jname)  # Name of atoms in the JSON file
+        self.atoms_type: dict[str, int]  # Name and type of atoms in chain
+        self.atoms_type = self.get_types(param.df, files.atoms)
+        self.types: list[int] = list(self.atoms_type.values())
+        self.weight: str = files.weight  # Weight of the atoms
+        self.json_masses: typing.Union[np.ndarray, None] = \
+            param.get_masses()  # For frames, which have no Masses
+        self.nframes: int = 0  # Number of the frames
+        self.rg_stat = stats.Welford()  # Rg of all the chains and frames
+        self.rg_frames = stats.BlockAverage()  # Mean Rg of each frame
+        self.asphericity_stat = stats.Welford()
+        self.acylindricity_stat = stats.Welford()
+        self.anisotropy_stat = stats.Welford()
+        self.tensor_stat = stats.Welford((3, 3))  # Gyration tensors
 
-    def gyration(self,
-                 obj: relmp.ReadData,  # All the infos in the data file
-                 files: get_prompt.Prompts  # All the infos in the prompt file
-                 ) -> None:
-        chains: pd.DataFrame  # Coordinates for all the atoms in the chain
-        atoms_type: dict[str, int]
-        chains, atoms_type = self.get_chain(obj.Atoms_df, files)
-        self.radius_geyration(chains, files.tails, atoms_type)
+    def analyse(self,
+                obj: relmp.ReadData  # All the infos in the data file
+                ) -> dict[str, np.ndarray]:
+        """return the gyration tensor, Rg and shape of all the chains of
+        the snapshot, without adding them to the sums"""
+        chains: atom_table.AtomTable  # All the atoms in the chains
+        masses: typing.Union[np.ndarray, None] = None  # Mass of each type
+        chains = self.get_chain(obj)
+        if self.weight == 'mass':
+            masses = self.get_masses(obj)
+        mols, tensor = self.radius_geyration(chains, masses)
+        values: dict[str, np.ndarray] = dict(mols=mols, tensor=tensor)
+        values['rg'] = np.sqrt(np.trace(tensor, axis1=1, axis2=2))
+        values.update(self.get_shapes(tensor))
+        return values
+
+    def accumulate(self,
+                   values: dict[str, np.ndarray]  # From `analyse`
+                   ) -> None:
+        """add the values of one snapshot to the sums"""
+        self.mols, self.tensor = values['mols'], values['tensor']
+        self.rg, self.eigvals = values['rg'], values['eigvals']
+        self.asphericity = values['asphericity']
+        self.acylindricity = values['acylindricity']
+        self.anisotropy = values['anisotropy']
+        self.nframes += 1
+        self.rg_stat.add_batch(self.rg)
+        self.rg_frames.add(np.mean(self.rg))
+        self.asphericity_stat.add_batch(self.asphericity)
+        self.acylindricity_stat.add_batch(self.acylindricity)
+        self.anisotropy_stat.add_batch(self.anisotropy)
+        self.tensor_stat.add_batch(self.tensor)
 
     def get_chain(self,
-                  df: pd.DataFrame,  # All the atoms in system
-                  files: get_prompt.Prompts  # Data in the info file
-                  ) -> tuple[pd.DataFrame, dict]:
+                  obj: relmp.ReadData  # All the infos in the data file
+                  ) -> atom_table.AtomTable:
         """get the atoms from datafile based on the type"""
-        atom_types: dict[str, int]  # Name and type of each atom in the chain
-        chains: pd.DataFrame  # Coordinates for all the atoms in the chain
-        param = rejs.ReadJson(files.jname)  # Name of atoms in the JSON file
-        atom_types = self.get_types(param.df, files.atoms)
-        chains = self.chain_df(atom_types, df)
-        del df
-        return chains, atom_types
+        chains: atom_table.AtomTable  # All the atoms in the chains
+        chains = pbc.get_whole(obj, self.types, bonds=True)
+        del obj
+        return chains
 
     def get_types(self,
                   df: pd.DataFrame,  # All the atoms coords in the system
@@ -70,45 +129,71 @@ class RadiusGyration:
         type_dict = {k: v for k, v in zip(df['name'], df['typ']) if k in atoms}
         return type_dict
 
-    def chain_df(self,
-                 atoms_types: dict[str, int],  # Wanted atoms name and type
-                 df: pd.DataFrame  # All the atoms coords in the system
-                 ) -> pd.DataFrame:
-        """get the atoms coords for all the chain"""
-        i_df: pd.DataFrame  # data for each type
-        df_list: list[pd.DataFrame] = []  # append dataframe for each atom
-        chains: pd.DataFrame  # Main data to return
-        name: str  # Name of each atom
-        typ: int  # Type of each atoms
-        for name, typ in atoms_types.items():
-            i_df = df.loc[df['typ'] == typ]
-            df_list.append(i_df)
-        chains = pd.concat(df_list)
-        chains.sort_values(by=['atom_id'], axis=0, inplace=True)
-        del df
-        return chains
+    def get_masses(self,
+                   obj: relmp.ReadData  # All the infos in the data file
+                   ) -> np.ndarray:
+        """return the mass of each type, indexed by the type, from
+        Masses of the data file or, for a frame, from the JSON file"""
+        if not hasattr(obj, 'Masses_df'):
+            if self.json_masses is not None:
+                return self.json_masses
+            exit(f'\t{bcolors.FAIL}Error! There are no masses for the '
+                 f'mass weighting in the input{bcolors.ENDC}\n')
+        typ: np.ndarray = obj.Masses_df['typ'].to_numpy(dtype=np.int64)
+        masses: np.ndarray = np.zeros(typ.max() + 1, dtype=np.float64)
+        masses[typ] = obj.Masses_df['mass'].to_numpy(dtype=np.float64)
+        return masses
 
     def radius_geyration(self,
-                         df: pd.DataFrame,  # Data of all the chains
-                         tails: str,  # Name of the head and tail atom in chain
-                         atoms_type: dict[str, int]  # Name & type of each atom
-                         ) -> None:
-        """calculate the radius of the gyration"""
-        mols: list[int]  # unique list of the molecules id (each chain id)
-        mols = list(df['mol'])
-        mols = list(set(mols))
-        tail_type: int  # Type of the head and tail atoms
-        tail_type = atoms_type[tails]
-        for mol in mols[0:1]:
-            self.get_gyration(df.loc[df['mol'] == mol], tail_type)
-
-    def get_gyration(self,
-                     df: pd.DataFrame,  # infos for each mol (chain)
-                     tail_type: int  # type of the head and tail atoms
-                     ) -> None:
-        """calculate radius of gyration for each chain (molecule)"""
-        tails_list: list[tuple[float, float, float]]  # Coords of the tails
-        tails_list = []
-        for i, atom in df.iterrows():
-            if atom['typ'] == tail_type:
-                tails_list.append((atom['x'], atom['y'], atom['z']))
+                         chains: atom_table.AtomTable,  # All the chains
+                         masses: typing.Union[np.ndarray, None]  # By type
+                         ) -> tuple[np.ndarray, np.ndarray]:
+        """calculate the gyration tensor of all the chains
+        return the id of each chain (molecule) and its tensor (Mx3x3)"""
+        index: atom_table.MolIndex = chains.mol_index
+        xyz: np.ndarray = chains.xyz[index.order].astype(np.float64)
+        weight: np.ndarray  # Weight of each atom, mass or one
+        if masses is None:
+            weight = np.ones(len(xyz))
+        else:
+            weight = masses[chains.typ[index.order]]
+        w_sum: np.ndarray = index.reduce(weight)
+        com: np.ndarray = index.reduce(xyz * weight[:, None]) / w_sum[:, None]
+        xyz = xyz - index.repeat(com)
+        tensor: np.ndarray = index.reduce(
+            weight[:, None, None] * np.einsum('ij,ik->ijk', xyz, xyz)) / \
+            w_sum[:, None, None]
+        del chains, xyz
+        return index.mols, tensor
+
+    def get_shapes(self,
+                   tensor: np.ndarray  # Gyration tensors of chains (Mx3x3)
+                   ) -> dict[str, np.ndarray]:
+        """eigenvalues of all the tensors and the shape descriptors"""
+        eigvals: np.ndarray = np.linalg.eigvalsh(tensor)  # Ascending
+        l1, l2, l3 = eigvals[:, 0], eigvals[:, 1], eigvals[:, 2]
+        rg2: np.ndarray = l1 + l2 + l3
+        return dict(eigvals=eigvals,
+                    asphericity=l3 - 0.5 * (l1 + l2),
+                    acylindricity=l2 - l1,
+                    anisotropy=1.5 * np.sum(eigvals**2, axis=1) / rg2**2
+                    - 0.5)
+
+    def print_results(self) -> None:
+        """print the statistics of the radius of gyration"""
+        tensor: np.ndarray = self.tensor_stat.mean  # Average tensor
+        print(f'{bcolors.OKGREEN}\tNumber of frames = {self.nframes}\n'
+              f'\tNumber of chains = {len(self.rg)}\n'
+              f'\tAverage Rg = {float(self.rg_stat.mean):.4f} +/- '
+              f'{stats.error_text(self.rg_frames.sem)} '
+              f'(std = {float(self.rg_stat.std):.4f}) [A]\n'
+              f'\tAverage asphericity = '
+              f'{float(self.asphericity_stat.mean):.4f} [A^2]\n'
+              f'\tAverage acylindricity = '
+              f'{float(self.acylindricity_stat.mean):.4f} [A^2]\n'
+              f'\tAverage relative shape anisotropy = '
+              f'{float(self.anisotropy_stat.mean):.4f}\n'
+              f'\tAverage tensor (xx, yy, zz, xy, xz, yz) = '
+              f'({tensor[0, 0]:.4f}, {tensor[1, 1]:.4f}, {tensor[2, 2]:.4f}, '
+              f'{tensor[0, 1]:.4f}, {tensor[0, 2]:.4f}, {tensor[1, 2]:.4f})'
+              f' [A^2]{bcolors.ENDC}\n')
@@ -0,0 +1,182 @@
+import typing
+import collections
+import numpy as np
+import pbc
+import stats
+import angle
+import neighbors
+import atom_table
+import get_prompt
+import read_json as rejs
+import read_lmp_data as relmp
+from colors_text import TextColor as bcolors
+
+
+class Doc:
+    """hydrogen bonds between the water molecules
+    The water molecules are found as in the angle style (one O and two
+    H in each molecule). A donor O-H and an acceptor O are H-bonded if:
+        O...O distance < cutoff (default 3.5 A)
+        angle between O-H and O...O < 30 deg
+    The O...O pairs are found with a cell list (neighbors.CellList).
+    Each H-bond is kept as one int64 key (donor mol, which H, acceptor
+    mol), and the H-bonds of a frame are a sorted array of keys, so the
+    H-bonds of two frames are compared by `np.isin` of two arrays.
+    Lifetimes, over the frames of a trajectory:
+        C(t) = <h(0) h(t)> / <h(0)>, intermittent: h(t) is one if the
+            H-bond is there at both 0 and t, whatever between them, for
+            lags up to NLAG frames
+        continuous lifetime: number of the frames an H-bond is there
+            without a break; the H-bonds which are still there at the
+            last frame are not counted
+    Output:
+        Average number of H-bonds of a molecule, fraction of molecules
+        with n H-bonds, and the continuous lifetime [frames]
+        hbond_slab.txt: z of the slab, molecules, H-bonds per molecule
+        hbond_lifetime.txt: lag [frames], C(lag)
+    """
+
+
+class HBond(angle.Water):
+    """find the H-bonds of each frame and accumulate them"""
+    CUTOFF: float = 3.5  # Largest O...O distance of an H-bond
+    ANGLE: float = 30.0  # Largest H-O...O angle of an H-bond [deg]
+    NLAG: int = 50  # Longest lag of C(t) in frames
+    MAXHB: int = 8  # Most H-bonds of a molecule in the distribution
+    SHIFT: int = 32  # Bits of the acceptor mol in a key
+
+    def __init__(self,
+                 files: get_prompt.Prompts  # All the infos in the prompt file
+                 ) -> None:
+        print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
+              f'\tGetting hydrogen bonds of water{bcolors.ENDC}')
+        param = rejs.ReadJson(files.jname)
+        self.atom_type: list[int]  # List of the atoms type in the data file
+        self.atom_type = self.get_types(param.df, files.atoms)
+        self.types: list[int] = self.atom_type  # Atoms to read
+        self.cutoff: float = files.cutoff or self.CUTOFF
+        self.cos_max: float = float(np.cos(np.radians(self.ANGLE)))
+        self.cells = neighbors.CellList(self.cutoff)
+        self.nframes: int = 0  # Number of the frames
+        self.hb_stat = stats.Welford()  # H-bonds of all the molecules
+        self.hb_frames = stats.BlockAverage()  # Mean H-bonds of frames
+        self.count_hist = np.zeros(self.MAXHB + 1, dtype=np.int64)
+        self.init_slabs()  # H-bonds and molecules in the slabs
+        # Keys of the H-bonds of the last NLAG + 1 frames, for C(t)
+        self.history: collections.deque = \
+            collections.deque(maxlen=self.NLAG + 1)
+        self.corr = np.zeros(self.NLAG + 1)  # Sum of h(0) h(t)
+        self.corr_norm = np.zeros(self.NLAG + 1)  # Sum of h(0)
+        self.alive = np.zeros(0, dtype=np.int64)  # Keys of last frame
+        self.born = np.zeros(0, dtype=np.int64)  # First frame of them
+        self.lifetimes = stats.Welford()  # Continuous lifetimes
+        del files
+
+    def analyse(self,
+                obj: relmp.ReadData  # Data file or a frame of trajectory
+                ) -> dict[str, typing.Any]:
+        """return the H-bonds of the snapshot as keys, and the number of
+        the H-bonds of each molecule by slabs"""
+        water: atom_table.AtomTable  # water atoms of the snapshot
+        box: np.ndarray = pbc.get_box(obj)  # Length of the box in x, y, z
+        water = pbc.get_whole(obj, self.atom_type)
+        mols, orgin, h1, h2 = self.mk_vectors(water)
+        self.cells.set_box(obj)
+        donor, which, acceptor = self.find_hbonds(orgin, h1, h2, box)
+        count: np.ndarray = np.bincount(donor, minlength=len(mols)) + \
+            np.bincount(acceptor, minlength=len(mols))
+        keys: np.ndarray = np.sort(
+            ((mols[donor].astype(np.int64) * 2 + which) << self.SHIFT) |
+            mols[acceptor].astype(np.int64))
+        return dict(count=count,
+                    count_hist=np.bincount(np.minimum(count, self.MAXHB),
+                                           minlength=self.MAXHB + 1),
+                    keys=keys,
+                    **self.get_slabs(orgin[:, 2], obj.Zlim, count))
+
+    def find_hbonds(self,
+                    orgin: np.ndarray,  # Coordinates of O of all the mols
+                    h1: np.ndarray,  # Coordinates of H1 of all the mols
+                    h2: np.ndarray,  # Coordinates of H2 of all the mols
+                    box: np.ndarray  # Length of the box in x, y, z
+                    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """return the donor molecule, its H (0 or 1), and the acceptor
+        molecule of each H-bond"""
+        i, j, _ = self.cells.pairs(orgin)
+        o_o: np.ndarray = pbc.min_image(orgin[j] - orgin[i], box)
+        # Each O...O pair, in both directions: donor -> acceptor
+        donors: np.ndarray = np.concatenate((i, j))
+        acceptors: np.ndarray = np.concatenate((j, i))
+        o_o = self.unit_vector(np.vstack((o_o, -o_o)))
+        found: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        for which, hydrogen in enumerate((h1, h2)):
+            o_h: np.ndarray = self.unit_vector(hydrogen[donors] -
+                                               orgin[donors])
+            bond: np.ndarray = \
+                np.einsum('ij,ij->i', o_h, o_o) > self.cos_max
+            found.append((donors[bond], np.full(bond.sum(), which),
+                          acceptors[bond]))
+        donor, which_h, acceptor = (np.concatenate(item)
+                                    for item in zip(*found))
+        return donor, which_h, acceptor
+
+    def accumulate(self,
+                   values: dict[str, typing.Any]  # From `analyse`
+                   ) -> None:
+        """add the H-bonds of one snapshot to the sums and lifetimes"""
+        self.hb_stat.add_batch(values['count'])
+        self.hb_frames.add(np.mean(values['count']))
+        self.count_hist += values['count_hist']
+        self.add_slabs(values)
+        self.update_lifetimes(values['keys'])
+        self.nframes += 1
+
+    def update_lifetimes(self,
+                         keys: np.ndarray  # Sorted keys of the H-bonds
+                         ) -> None:
+        """add the new frame to C(t) and to the continuous lifetimes"""
+        self.history.appendleft(keys)
+        for lag, old in enumerate(self.history):
+            self.corr[lag] += np.count_nonzero(
+                np.isin(old, keys, assume_unique=True))
+            self.corr_norm[lag] += len(old)
+        kept: np.ndarray = np.isin(self.alive, keys, assume_unique=True)
+        if (~kept).any():
+            self.lifetimes.add_batch(self.nframes - self.born[~kept])
+        born: np.ndarray = np.full(len(keys), self.nframes, dtype=np.int64)
+        index: np.ndarray = np.searchsorted(self.alive, keys)
+        was: np.ndarray = np.zeros(len(keys), dtype=bool)
+        inside: np.ndarray = index < len(self.alive)
+        was[inside] = self.alive[index[inside]] == keys[inside]
+        born[was] = self.born[index[was]]
+        self.alive, self.born = keys, born
+
+    def print_results(self) -> None:
+        """print the average H-bonds and write the profiles"""
+        fraction: np.ndarray = \
+            self.count_hist / max(int(self.count_hist.sum()), 1)
+        print(f'{bcolors.OKGREEN}\tNumber of frames = {self.nframes}\n'
+              f'\tAverage H-bonds of a molecule = '
+              f'{float(self.hb_stat.mean):.4f} +/- '
+              f'{stats.error_text(self.hb_frames.sem)}\n'
+              f'\tFraction of molecules with n H-bonds (n = 0 ... '
+              f'{self.MAXHB}+):\n\t\t'
+              f'{" ".join(f"{item:.4f}" for item in fraction)}\n'
+              f'\tContinuous lifetime = {float(self.lifetimes.mean):.4f} '
+              f'[frames] (of {self.lifetimes.n} H-bonds){bcolors.ENDC}')
+        self.write_slabs('hbond_slab.txt',
+                         'z [A], molecules, H-bonds per molecule')
+        self.write_lifetimes('hbond_lifetime.txt')
+        print()
+
+    def write_lifetimes(self,
+                        fname: str  # Name of the output file
+                        ) -> None:
+        """write the intermittent correlation C(t) of the H-bonds"""
+        lags: np.ndarray = np.flatnonzero(self.corr_norm > 0)
+        np.savetxt(fname,
+                   np.column_stack((lags, self.corr[lags] /
+                                    self.corr_norm[lags])),
+                   fmt=['%d', '%.6f'],
+                   header=f'lag [frames], C(lag); frames: {self.nframes}')
+        print(f'{bcolors.OKCYAN}\tWrote: `{fname}`{bcolors.ENDC}')
@@ -1,7 +1,15 @@
+import typing
 import get_prompt
 import read_lmp_data as relmp
+import read_lmp_traj as relmp_traj
+import parallel
 import angle
 import gyration
+import order
+import rdf
+import hbond
+import tetrahedral
+import density
 
 
 class Doc:
@@ -23,11 +31,50 @@ class Doc:
     """
 
 
-files = get_prompt.Prompts()
+# Class of each style; each one has `types` (of the atoms to read),
+# `analyse` and `accumulate` for a snapshot, and `print_results`
+STYLES: dict[str, type] = {'angle': angle.Angle,
+                           'gyration': gyration.RadiusGyration,
+                           'order': order.OrderParameter,
+                           'rdf': rdf.Rdf,
+                           'hbond': hbond.HBond,
+                           'tetrahedral': tetrahedral.Tetrahedral,
+                           'density': density.Density}
 
-if files.style == 'angle':
-    data = relmp.ReadData(files.fname)
-    water = angle.Angle(data, files)
-elif files.style == 'gyration':
-    data = relmp.ReadData(files.fname)
-    r_gyration = gyration.RadiusGyration(data, files)
+
+def main() -> None:
+    """read the input, run the style over the snapshots and write the
+    results; in a function so the workers of the pools (spawn) can
+    import this module without running it"""
+    files = get_prompt.Prompts()
+
+    analysis: typing.Any = STYLES[files.style](files)
+    # Only the atoms of the style are read from the file
+    types: list[int] = analysis.types
+
+    if files.fname.split('.')[1] in ['dump', 'lammpstrj']:
+        traj = relmp_traj.ReadTraj(files.fname, types=types)
+        if files.nworkers > 1 and files.buffers > 0:
+            # Frames are read here into shared memory, analysed by workers
+            parallel.run_frames_shared(traj, traj.index.select(files.frames),
+                                       [analysis], files.nworkers,
+                                       files.buffers)
+            snapshots = []
+        elif files.nworkers > 1:
+            # Frames are analysed by the workers and added here in order
+            parallel.run_frames(traj, traj.index.select(files.frames),
+                                analysis, files.nworkers)
+            snapshots = []
+        else:
+            snapshots = traj.frames(files.frames)
+    else:
+        snapshots = [relmp.ReadData(files.fname, cache=files.cache,
+                                    types=types, nworkers=files.nworkers)]
+
+    for data in snapshots:
+        analysis.accumulate(analysis.analyse(data))
+    analysis.print_results()
+
+
+if __name__ == '__main__':
+    main()
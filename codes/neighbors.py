@@ -0,0 +1,183 @@
+import typing
+import numpy as np
+import pbc
+from colors_text import TextColor as bcolors
+
+
+class Doc:
+    """neighbour search in the orthogonal periodic box with a cell list
+    The box (from Xlim, Ylim, Zlim of the data file or a frame) is cut
+    into cells which are not smaller than the cutoff in each axis, so
+    the neighbours of an atom are all in its cell or in the 26 cells
+    around it (periodic). The atoms are sorted by their cells, and for
+    every pair of neighbouring cells all the pairs of their atoms are
+    made at once with numpy; the pairs are taken in chunks, so the
+    memory stays small and the time grows linearly with the atoms.
+    With fewer than three cells in an axis, the same cell is around a
+    cell more than once; the pairs of cells are made unique, so every
+    pair of atoms is found once.
+    The cutoff must not be more than half of the shortest length of the
+    box, otherwise the minimum image cannot give all the pairs.
+    The grid (the pairs of the neighbouring cells) is kept and used
+    again for the next frame if the number of cells in each axis is the
+    same, which is the case when the box changes a little (NPT).
+    Output:
+        i, j, r: compact arrays of the pairs closer than the cutoff,
+            i < j for the atoms of one set, and r their distance by the
+            minimum image convention
+        k_nearest: index of the k nearest neighbours of each atom
+    """
+
+
+class CellList:
+    """pairs of the atoms closer than the cutoff"""
+    CHUNK: int = 1 << 22  # Most atom pairs to check at once
+
+    def __init__(self,
+                 cutoff: float  # Largest distance of a pair
+                 ) -> None:
+        self.cutoff: float = cutoff
+        self.ncells: np.ndarray = np.zeros(3, dtype=np.int64)  # In x, y, z
+        self.lo: np.ndarray = np.zeros(3)  # Lower corner of the box
+        self.box: np.ndarray = np.ones(3)  # Length of the box
+        self.cell_pairs: np.ndarray  # Pairs of the neighbouring cells
+
+    def set_box(self,
+                obj: typing.Any  # ReadData or a Frame, with Xlim, ...
+                ) -> None:
+        """set the box of the snapshot; the grid is made again only if
+        the number of the cells in an axis is changed"""
+        self.lo = np.array([obj.Xlim[0], obj.Ylim[0], obj.Zlim[0]],
+                           dtype=np.float64)
+        self.box = pbc.get_box(obj)
+        if self.cutoff > 0.5 * self.box.min():
+            exit(f'{bcolors.FAIL}{self.__class__.__name__}: The cutoff '
+                 f'`{self.cutoff}` is more than half of the shortest length '
+                 f'of the box `{self.box.min():.4f}`, the pairs would not '
+                 f'be found by the minimum image{bcolors.ENDC}\n')
+        ncells: np.ndarray = \
+            np.maximum(np.floor(self.box / self.cutoff), 1).astype(np.int64)
+        if not np.array_equal(ncells, self.ncells):
+            self.ncells = ncells
+            self.cell_pairs = self.mk_cell_pairs()
+
+    def mk_cell_pairs(self) -> np.ndarray:
+        """unique pairs (cell, neighbour cell), the 27 cells around each
+        cell (with itself) in the periodic grid"""
+        cells: np.ndarray = np.arange(np.prod(self.ncells))
+        index: np.ndarray = np.stack(np.unravel_index(cells, self.ncells),
+                                     axis=1)
+        shifts: np.ndarray = np.stack(np.meshgrid(
+            [-1, 0, 1], [-1, 0, 1], [-1, 0, 1], indexing='ij'),
+            axis=-1).reshape(-1, 3)
+        around: np.ndarray = \
+            (index[:, None, :] + shifts[None, :, :]) % self.ncells
+        neighbours: np.ndarray = np.ravel_multi_index(
+            (around[..., 0], around[..., 1], around[..., 2]), self.ncells)
+        pairs: np.ndarray = np.column_stack(
+            (np.repeat(cells, len(shifts)), neighbours.ravel()))
+        return np.unique(pairs, axis=0)
+
+    def bin_atoms(self,
+                  xyz: np.ndarray  # Coordinates of the atoms
+                  ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """sort the atoms by their cells; return the order, and the
+        start and number of the atoms of each cell in that order"""
+        frac: np.ndarray = np.mod((xyz - self.lo) / self.box, 1.0)
+        index: np.ndarray = \
+            np.minimum((frac * self.ncells).astype(np.int64),
+                       self.ncells - 1)
+        cell: np.ndarray = np.ravel_multi_index(
+            (index[:, 0], index[:, 1], index[:, 2]), self.ncells)
+        order: np.ndarray = np.argsort(cell, kind='stable')
+        counts: np.ndarray = \
+            np.bincount(cell, minlength=int(np.prod(self.ncells)))
+        starts: np.ndarray = np.cumsum(counts) - counts
+        return order, starts, counts
+
+    def pairs(self,
+              xyz: np.ndarray,  # Coordinates of the atoms (Nx3)
+              other: typing.Union[np.ndarray, None] = None  # Second set
+              ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """return i, j and the distance of all the pairs closer than the
+        cutoff; without `other` the pairs are in one set (i < j), with
+        it i is in the first set and j in the other one"""
+        xyz = np.asarray(xyz, dtype=np.float64)
+        same: bool = other is None
+        xyz_b: np.ndarray = xyz if same else \
+            np.asarray(other, dtype=np.float64)
+        order_a, starts_a, counts_a = self.bin_atoms(xyz)
+        order_b, starts_b, counts_b = \
+            (order_a, starts_a, counts_a) if same else self.bin_atoms(xyz_b)
+        c_a, c_b = self.cell_pairs[:, 0], self.cell_pairs[:, 1]
+        sizes: np.ndarray = counts_a[c_a] * counts_b[c_b]
+        keep: np.ndarray = sizes > 0
+        c_a, c_b, sizes = c_a[keep], c_b[keep], sizes[keep]
+        found: list[tuple[np.ndarray, ...]] = []  # Pairs of each chunk
+        bounds: np.ndarray = np.cumsum(sizes)
+        first: int = 0
+        while first < len(sizes):
+            base: int = int(bounds[first - 1]) if first else 0
+            last: int = max(int(np.searchsorted(
+                bounds, base + self.CHUNK, side='right')), first + 1)
+            found.append(self.check_pairs(
+                xyz, xyz_b, same, order_a, order_b,
+                starts_a[c_a[first:last]], starts_b[c_b[first:last]],
+                counts_b[c_b[first:last]], sizes[first:last]))
+            first = last
+        if not found:
+            return (np.zeros(0, dtype=np.int64),
+                    np.zeros(0, dtype=np.int64), np.zeros(0))
+        i, j, r = (np.concatenate(item) for item in zip(*found))
+        sort: np.ndarray = np.lexsort((j, i))
+        return i[sort], j[sort], r[sort]
+
+    def check_pairs(self,
+                    xyz_a: np.ndarray,  # Coordinates of the first set
+                    xyz_b: np.ndarray,  # Coordinates of the second set
+                    same: bool,  # If the two sets are the same
+                    order_a: np.ndarray,  # Atoms of the first set by cell
+                    order_b: np.ndarray,  # Atoms of the second set by cell
+                    start_a: np.ndarray,  # Start of the cell of each pair
+                    start_b: np.ndarray,  # Start of the neighbour cell
+                    count_b: np.ndarray,  # Atoms in the neighbour cell
+                    sizes: np.ndarray  # Atom pairs of each cell pair
+                    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """all the atom pairs of these cell pairs, closer than cutoff"""
+        block: np.ndarray = np.repeat(np.arange(len(sizes)), sizes)
+        k: np.ndarray = \
+            np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes,
+                                                    sizes)
+        i: np.ndarray = order_a[start_a[block] + k // count_b[block]]
+        j: np.ndarray = order_b[start_b[block] + k % count_b[block]]
+        if same:
+            keep: np.ndarray = i < j
+            i, j = i[keep], j[keep]
+        r: np.ndarray = np.linalg.norm(
+            pbc.min_image(xyz_b[j] - xyz_a[i], self.box), axis=1)
+        close: np.ndarray = r < self.cutoff
+        return i[close], j[close], r[close]
+
+
+def k_nearest(i: np.ndarray,  # First atom of the pairs
+              j: np.ndarray,  # Second atom of the pairs
+              r: np.ndarray,  # Distance of the pairs
+              natoms: int,  # Number of the atoms
+              k: int,  # Number of the neighbours for each atom
+              symmetric: bool = True  # If pairs are i < j of one set
+              ) -> np.ndarray:
+    """index of the k nearest neighbours (by distance) of each atom
+    from its pairs; -1 where an atom has fewer than k neighbours in the
+    cutoff"""
+    if symmetric:
+        i, j, r = np.concatenate((i, j)), np.concatenate((j, i)), \
+            np.concatenate((r, r))
+    order: np.ndarray = np.lexsort((j, r, i))
+    i, j = i[order], j[order]
+    counts: np.ndarray = np.bincount(i, minlength=natoms)
+    rank: np.ndarray = np.arange(len(i)) - np.repeat(
+        np.cumsum(counts) - counts, counts)
+    nearest: np.ndarray = np.full((natoms, k), -1, dtype=np.int64)
+    keep: np.ndarray = rank < k
+    nearest[i[keep], rank[keep]] = j[keep]
+    return nearest
@@ -0,0 +1,162 @@
+import typing
+import numpy as np
+import pandas as pd
+import pbc
+import stats
+import atom_table
+import get_prompt
+import read_json as rejs
+import read_lmp_data as relmp
+from colors_text import TextColor as bcolors
+
+
+class Doc:
+    """nematic order parameter for decane and surfactants chains
+    Each chain gives vectors along itself, which are chosen with the
+    `vector` key in the input file:
+        tails: end-to-end vector of the chain, from its first to its
+            last `tails` atom (e.g., CH3 -> CH3)
+        segment: C(i) -> C(i+2) vectors along the backbone, the atoms
+            in the `atoms` key are taken in the order of their ids
+    With the unit vectors u of all the chains:
+        P2 = <(3 cos^2(theta) - 1)/2>, theta is the angle with z axis
+        Q = <3/2 u u - 1/2 I>
+    The largest eigenvalue of Q is the order parameter S and its
+    eigenvector is the director. With `segment` vectors, Q of each
+    chain is also computed (all chains in one batched eigen-solve) and
+    its S tells how straight the chain is.
+    For trajectories, the frames are read one by one and only the
+    running statistics are kept; the errors are from block averaging
+    of the frames.
+    Output:
+        Average P2, S, and the director of all the frames
+    """
+
+
+class OrderParameter:
+    """get the chains and accumulate their order over the frames"""
+    def __init__(self,
+                 files: get_prompt.Prompts  # All the infos in the prompt file
+                 ) -> None:
+        print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
+              f'\tGetting order of chain molecules{bcolors.ENDC}')
+        param = rejs.ReadJson(files.jname)  # Name of atoms in the JSON file
+        self.atom_types: dict[str, int] = self.get_types(param.df, files)
+        self.types: list[int] = list(self.atom_types.values())
+        self.vector: str = files.vector
+        self.tails: str = files.tails
+        self.nframes: int = 0  # Number of the frames
+        self.p2_frames = stats.BlockAverage()  # P2 of each frame
+        self.s_frames = stats.BlockAverage()  # S of each frame
+        self.s_chain_frames = stats.BlockAverage()  # Mean S of chains
+        self.q_stat = stats.Welford((3, 3))  # Q of the frames
+
+    def get_types(self,
+                  df: pd.DataFrame,  # Name and type of atoms in JSON file
+                  files: get_prompt.Prompts  # All the infos in the prompt file
+                  ) -> dict[str, int]:
+        """find the int number for each atom in the json file"""
+        param_atoms: list[str] = list(df['name'])  # Type of atoms in jname
+        if not all(x in param_atoms for x in files.atoms):
+            exit(f'\t{bcolors.FAIL}Error! There is no type for one or'
+                 f' more of atoms: `{files.atoms}` in json file'
+                 f'{bcolors.ENDC}\n')
+        type_dict: dict[str, int]  # Name and type of each atom
+        type_dict = {k: v for k, v in zip(df['name'], df['typ'])
+                     if k in files.atoms}
+        return type_dict
+
+    def analyse(self,
+                obj: relmp.ReadData  # Data file or a frame of trajectory
+                ) -> dict[str, typing.Any]:
+        """return the order of the chains in this snapshot, without
+        adding it to the sums"""
+        chains: atom_table.AtomTable  # All the atoms of the chains
+        mols: np.ndarray  # Chain of each vector
+        vectors: np.ndarray  # Unit vectors along the chains
+        types: list[int]  # Type of the atoms for the vectors
+        if self.vector == 'tails':
+            types = [self.atom_types[self.tails]]
+        else:
+            types = self.types
+        chains = pbc.get_whole(obj, types, bonds=True)
+        mols, vectors = self.get_vectors(chains)
+        q_tensor: np.ndarray = self.q_tensor(vectors)
+        values: dict[str, typing.Any] = dict(
+            p2=np.mean(1.5 * vectors[:, 2]**2 - 0.5),
+            s=np.linalg.eigvalsh(q_tensor)[-1],
+            q_tensor=q_tensor)
+        if self.vector == 'segment':
+            values['s_chain'] = np.mean(self.chain_order(mols, vectors))
+        del chains, obj
+        return values
+
+    def accumulate(self,
+                   values: dict[str, typing.Any]  # From `analyse`
+                   ) -> None:
+        """add the order of one snapshot to the sums"""
+        self.nframes += 1
+        self.p2_frames.add(values['p2'])
+        self.s_frames.add(values['s'])
+        self.q_stat.add(values['q_tensor'])
+        if 's_chain' in values:
+            self.s_chain_frames.add(values['s_chain'])
+
+    def get_vectors(self,
+                    chains: atom_table.AtomTable  # Atoms of the chains
+                    ) -> tuple[np.ndarray, np.ndarray]:
+        """return the chain of each vector and the unit vectors"""
+        index: atom_table.MolIndex = chains.mol_index
+        mol: np.ndarray = chains.mol[index.order]
+        xyz: np.ndarray = chains.xyz[index.order].astype(np.float64)
+        vectors: np.ndarray  # Vectors along the chains
+        mols: np.ndarray  # Chain of each vector
+        if self.vector == 'tails':
+            long: np.ndarray = index.counts > 1  # Chains with two tails
+            mols = index.mols[long]
+            vectors = xyz[index.offsets[1:][long] - 1] - \
+                xyz[index.starts[long]]
+        else:
+            same: np.ndarray = mol[2:] == mol[:-2]
+            vectors = (xyz[2:] - xyz[:-2])[same]
+            mols = mol[2:][same]
+        if not len(vectors):
+            exit(f'\t{bcolors.FAIL}Error! There are no vectors along the '
+                 f'chains, check `atoms` and `tails`{bcolors.ENDC}\n')
+        return mols, vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def q_tensor(self,
+                 vectors: np.ndarray  # Unit vectors, one in each row
+                 ) -> np.ndarray:
+        """return the Q tensor of the vectors"""
+        return 1.5 * np.einsum('ij,ik->jk', vectors, vectors) / \
+            len(vectors) - 0.5 * np.eye(3)
+
+    def chain_order(self,
+                    mols: np.ndarray,  # Chain of each vector, sorted
+                    vectors: np.ndarray  # Unit vectors, one in each row
+                    ) -> np.ndarray:
+        """return S of each chain from its own Q tensor"""
+        index = atom_table.MolIndex(np.arange(len(mols)), mols)
+        q_chains: np.ndarray = 1.5 * index.reduce(
+            np.einsum('ij,ik->ijk', vectors, vectors)) / \
+            index.counts[:, None, None] - 0.5 * np.eye(3)
+        return np.linalg.eigvalsh(q_chains)[:, -1]
+
+    def print_results(self) -> None:
+        """print the average order of all the frames"""
+        eigvals, eigvecs = np.linalg.eigh(self.q_stat.mean)
+        director: np.ndarray = eigvecs[:, -1]
+        print(f'{bcolors.OKGREEN}\tNumber of frames = {self.nframes}\n'
+              f'\tAverage P2 (z axis) = {self.p2_frames.mean:.4f} +/- '
+              f'{stats.error_text(self.p2_frames.sem)}\n'
+              f'\tAverage S = {self.s_frames.mean:.4f} +/- '
+              f'{stats.error_text(self.s_frames.sem)}\n'
+              f'\tS of the average Q = {eigvals[-1]:.4f}, director = '
+              f'({director[0]:.4f}, {director[1]:.4f}, {director[2]:.4f})',
+              end='')
+        if self.vector == 'segment':
+            print(f'\n\tAverage S of the chains = '
+                  f'{self.s_chain_frames.mean:.4f} +/- '
+                  f'{stats.error_text(self.s_chain_frames.sem)}', end='')
+        print(f'{bcolors.ENDC}\n')
@@ -0,0 +1,386 @@
+import typing
+import functools
+import collections
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+import atom_table
+import read_lmp_traj as relmp_traj
+
+
+class Doc:
+    """parse parts of a big text file in parallel
+    A section of the file (offset and number of bytes) is split into
+    ranges of about the same size, which start and end at the start of
+    a line. Each worker of a process pool reads its range, parses it
+    with the given parser (a function at the top of a module, which
+    gets the lines and returns a 2D array, or a 2D array and a list of
+    the comments of the lines), and puts the array in a new block of
+    shared memory; only the name and shape of the block (and the
+    comments) are sent back, not the numbers. The blocks are stitched together
+    in the order of the ranges, so the rows are the same as the rows
+    of the serial parser.
+    Frames of a trajectory are analysed in the same way: the selected
+    frames are split into chunks of CHUNK frames, each worker reads
+    the frames of a chunk by the frame index and returns the values of
+    the style for each frame (`analyse`). The values are given back in
+    the order of the frames, and are added to the sums by the style
+    (`accumulate`) in this process, so the results are the same, bit by
+    bit, as the results of reading the frames one by one.
+    With a ring of shared memory blocks (FrameRing), the frames are
+    read only once, here, into the free block of the ring, and the
+    workers of one or more styles look at the same block as read-only
+    numpy arrays, without any copy; a block is used again when all the
+    styles are done with its frame.
+    An exit of a worker (e.g., an error message of a style) is sent to
+    this process as WorkerExit and this process exits with it; an exit
+    in a worker itself would leave the pool waiting for its task.
+    """
+
+
+CHUNK: int = 8  # Frames for each task of a worker
+_READER: typing.Any = None  # Trajectory reader of a worker
+_STYLE: typing.Any = None  # Analysis (style) of a worker
+
+
+class WorkerExit(Exception):
+    """the message of an exit in a worker"""
+
+
+def catch_exit(func: typing.Callable[..., typing.Any]
+               ) -> typing.Callable[..., typing.Any]:
+    """run a task of a worker and send its exit to the parent"""
+    @functools.wraps(func)
+    def task(*args: typing.Any) -> typing.Any:
+        try:
+            return func(*args)
+        except SystemExit as err:
+            raise WorkerExit(err.code) from None
+    return task
+
+
+def line_ranges(fname: str,  # Name of the file
+                offset: int,  # Byte offset of the section
+                nbytes: int,  # Length of the section in bytes
+                nparts: int  # Number of the ranges
+                ) -> list[tuple[int, int]]:
+    """split the section into ranges which start at the start of a line
+    """
+    end: int = offset + nbytes
+    starts: list[int] = [offset]  # Start of each range
+    with open(fname, 'rb') as f:
+        for i in range(1, nparts):
+            f.seek(offset + i * nbytes // nparts)
+            f.readline()  # To the start of the next line
+            starts.append(min(max(f.tell(), starts[-1]), end))
+    starts.append(end)
+    return [(lo, hi) for lo, hi in zip(starts[:-1], starts[1:]) if hi > lo]
+
+
+@catch_exit
+def parse_range(task: tuple[typing.Any, ...]  # fname, lo, hi, parser, args
+                ) -> tuple[typing.Union[str, None], tuple[int, ...],
+                           typing.Union[list[str], None]]:
+    """parse the lines of one range in a worker; return the name of the
+    shared memory block of the result, its shape, and the comments of
+    the lines if the parser gives them"""
+    fname, lo, hi, parser, args = task
+    with open(fname, 'rb') as f:
+        f.seek(lo)
+        lines: list[str] = \
+            [line for line in f.read(hi - lo).decode().splitlines()
+             if line.strip()]
+    result: typing.Any = parser(lines, *args)
+    comments: typing.Union[list[str], None] = None
+    if isinstance(result, tuple):
+        result, comments = result
+    data: np.ndarray = np.ascontiguousarray(result, dtype=np.float64)
+    if not data.size:
+        return None, data.shape, comments
+    shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+    np.ndarray(data.shape, dtype=np.float64, buffer=shm.buf)[:] = data
+    shm.close()
+    return shm.name, data.shape, comments
+
+
+def parse_section(fname: str,  # Name of the file
+                  offset: int,  # Byte offset of the section
+                  nbytes: int,  # Length of the section in bytes
+                  nworkers: int,  # Number of the processes
+                  parser: typing.Callable[..., typing.Any],  # lines -> 2D
+                  *args: typing.Any  # Other arguments of the parser
+                  ) -> typing.Any:
+    """parse the section with a pool of processes and return all the
+    rows in the order of the file, and their comments if the parser
+    gives them, as the parser does for the whole section"""
+    tasks: list[tuple[typing.Any, ...]] = \
+        [(fname, lo, hi, parser, args)
+         for lo, hi in line_ranges(fname, offset, nbytes, nworkers)]
+    if not tasks:
+        return parser([], *args)
+    # One tracker for the blocks of all the workers, which are freed here
+    resource_tracker.ensure_running()
+    try:
+        with multiprocessing.Pool(min(nworkers, max(len(tasks), 1))) as pool:
+            results = gather([pool.apply_async(parse_range, (task,))
+                              for task in tasks])
+    except WorkerExit as err:
+        exit(err.args[0])
+    data: np.ndarray = stitch(results)
+    if results[0][2] is None:
+        return data
+    return data, [line for *_, comments in results for line in comments]
+
+
+def gather(jobs: list[typing.Any]  # AsyncResult of parse_range
+           ) -> list[tuple[typing.Any, ...]]:
+    """wait for all the ranges; if one fails, free the blocks of the
+    others before raising its error"""
+    results: list[tuple[typing.Any, ...]] = []
+    error: typing.Union[Exception, None] = None
+    for job in jobs:
+        try:
+            results.append(job.get())
+        except Exception as err:
+            error = error or err
+    if error is not None:
+        for name, *_ in results:
+            if name is not None:
+                free(name)
+        raise error
+    return results
+
+
+def init_frames(reader: typing.Any,  # ReadTraj with its frame index
+                style: typing.Any  # Style with an `analyse` method
+                ) -> None:
+    """set the reader and the style of a worker, once for each worker"""
+    global _READER, _STYLE
+    _READER, _STYLE = reader, style
+
+
+@catch_exit
+def analyse_frames(ids: np.ndarray  # Index of the frames of a chunk
+                   ) -> list[typing.Any]:
+    """values of the style for each frame of the chunk, in a worker"""
+    return [_STYLE.analyse(frame) for frame in _READER.read_frames(ids)]
+
+
+def run_frames(reader: typing.Any,  # ReadTraj of the trajectory
+               ids: np.ndarray,  # Index of the selected frames
+               style: typing.Any,  # Style with `analyse` and `accumulate`
+               nworkers: int  # Number of the processes
+               ) -> None:
+    """analyse the frames with a pool of processes and accumulate their
+    values by the style in the order of the frames"""
+    chunks: list[np.ndarray] = \
+        reader.index.split(ids, max(-(-len(ids) // CHUNK), 1))
+    try:
+        with multiprocessing.Pool(min(nworkers, max(len(chunks), 1)),
+                                  initializer=init_frames,
+                                  initargs=(reader, style)) as pool:
+            for values in pool.imap(analyse_frames, chunks):
+                for frame_values in values:
+                    style.accumulate(frame_values)
+    except WorkerExit as err:
+        exit(err.args[0])
+
+
+class FrameRing:
+    """shared memory blocks for the atoms of a few frames
+    Each block (slot) has the arrays of an AtomTable for up to `natoms`
+    atoms: xyz, charge (if there are charges), atom_id, mol, typ, and
+    images; other columns (e.g. velocities) are not kept. The frames of
+    a trajectory have the same columns, so if they have image flags is
+    kept once for the ring."""
+    def __init__(self,
+                 nslots: int,  # Number of the blocks
+                 natoms: int,  # Most atoms in a frame
+                 dtype: type = np.float64,  # Type of the coordinates
+                 charge: bool = False,  # If there are charges
+                 names: typing.Union[list[str], None] = None,  # To attach
+                 has_images: bool = False  # Flags read or xyz unwrapped
+                 ) -> None:
+        self.natoms: int = natoms
+        self.has_images: bool = has_images
+        self.dtype: np.dtype = np.dtype(dtype)
+        self.charge: bool = charge
+        self.layout: dict[str, tuple[int, np.dtype, tuple[int, ...]]] = \
+            self.mk_layout()
+        size: int = max(sum(np.prod(shape, dtype=np.int64) * dtype.itemsize
+                            for _, dtype, shape in self.layout.values()), 1)
+        if names is None:
+            self.blocks: list[shared_memory.SharedMemory] = \
+                [shared_memory.SharedMemory(create=True, size=int(size))
+                 for _ in range(nslots)]
+        else:
+            self.blocks = [shared_memory.SharedMemory(name=name)
+                           for name in names]
+
+    def mk_layout(self) -> dict[str, tuple[int, np.dtype, tuple[int, ...]]]:
+        """byte offset, type and shape of each array in a block, the
+        wider types first so all of them are aligned"""
+        arrays: list[tuple[str, np.dtype, tuple[int, ...]]] = \
+            [('xyz', self.dtype, (self.natoms, 3))]
+        if self.charge:
+            arrays.append(('charge', np.dtype(np.float64), (self.natoms,)))
+        arrays.extend([(key, np.dtype(np.int32), (self.natoms,))
+                       for key in ['atom_id', 'mol', 'typ']])
+        arrays.append(('images', np.dtype(np.int16), (self.natoms, 3)))
+        layout: dict[str, tuple[int, np.dtype, tuple[int, ...]]] = dict()
+        offset: int = 0
+        for key, dtype, shape in arrays:
+            layout[key] = (offset, dtype, shape)
+            offset += int(np.prod(shape)) * dtype.itemsize
+        return layout
+
+    def spec(self) -> dict[str, typing.Any]:
+        """what a worker needs to attach to the blocks"""
+        return dict(nslots=len(self.blocks), natoms=self.natoms,
+                    dtype=self.dtype, charge=self.charge,
+                    names=[block.name for block in self.blocks],
+                    has_images=self.has_images)
+
+    def views(self,
+              slot: int,  # Index of the block
+              natoms: int  # Number of the atoms in the frame
+              ) -> dict[str, np.ndarray]:
+        """arrays of the block, for the atoms of the frame"""
+        views: dict[str, np.ndarray] = dict()
+        for key, (offset, dtype, shape) in self.layout.items():
+            full = np.ndarray(shape, dtype=dtype,
+                              buffer=self.blocks[slot].buf, offset=offset)
+            views[key] = full[:natoms]
+        return views
+
+    def put(self,
+            slot: int,  # Index of the block
+            frame: relmp_traj.Frame  # Frame to put in the block
+            ) -> None:
+        """copy the atoms of the frame into the block"""
+        for key, view in self.views(slot, frame.NAtoms).items():
+            view[:] = getattr(frame.atoms, key)
+
+    def get(self,
+            slot: int,  # Index of the block
+            timestep: int,  # Timestep of the frame
+            box: np.ndarray,  # lo and hi of the box in x, y, z (3x2)
+            natoms: int  # Number of the atoms in the frame
+            ) -> relmp_traj.Frame:
+        """the frame in the block; its arrays are read-only views"""
+        views: dict[str, np.ndarray] = self.views(slot, natoms)
+        for view in views.values():
+            view.flags.writeable = False
+        atoms = atom_table.AtomTable(views['atom_id'], views['mol'],
+                                     views['typ'], views['xyz'],
+                                     views['images'], views.get('charge'),
+                                     dtype=self.dtype,
+                                     has_images=self.has_images)
+        return relmp_traj.Frame(timestep, box, atoms)
+
+    def close(self) -> None:
+        for block in self.blocks:
+            block.close()
+
+    def unlink(self) -> None:
+        for block in self.blocks:
+            block.unlink()
+
+
+_RING: typing.Union[FrameRing, None] = None  # The ring of a worker
+_STYLES: list[typing.Any] = []  # All the styles, for a worker
+
+
+def init_ring(spec: dict[str, typing.Any],  # From FrameRing.spec
+              styles: list[typing.Any]  # Styles with `analyse`
+              ) -> None:
+    """attach a worker to the ring, once for each worker"""
+    global _RING, _STYLES
+    _RING, _STYLES = FrameRing(**spec), styles
+
+
+@catch_exit
+def analyse_slot(task: tuple[int, int, int, np.ndarray, int]
+                 ) -> typing.Any:
+    """values of one style for the frame in one block, in a worker"""
+    i_style, slot, timestep, box, natoms = task
+    return _STYLES[i_style].analyse(_RING.get(slot, timestep, box, natoms))
+
+
+def run_frames_shared(reader: relmp_traj.ReadTraj,  # Reader of the traj
+                      ids: np.ndarray,  # Index of the selected frames
+                      styles: list[typing.Any],  # Styles to run
+                      nworkers: int,  # Number of the processes
+                      nslots: int  # Number of the frames in the ring
+                      ) -> None:
+    """read each frame once into the ring and analyse it by all the
+    styles in the workers; the values are accumulated by each style in
+    the order of the frames"""
+    if not len(ids):
+        return
+    frame: relmp_traj.Frame = reader.get_frame(ids[0])
+    ring = FrameRing(max(nslots, 1), int(reader.index.natoms[ids].max()),
+                     reader.dtype, frame.atoms.charge is not None,
+                     has_images=frame.atoms.has_images)
+    pending: collections.deque = collections.deque()  # Frames in the ring
+    try:
+        with multiprocessing.Pool(nworkers, initializer=init_ring,
+                                  initargs=(ring.spec(), styles)) as pool:
+            for i_frame, frame in enumerate(reader.read_frames(ids)):
+                if len(pending) == len(ring.blocks):
+                    collect(pending.popleft(), styles)
+                slot: int = i_frame % len(ring.blocks)
+                ring.put(slot, frame)
+                pending.append([pool.apply_async(
+                    analyse_slot,
+                    ((i_style, slot, frame.timestep, frame.box,
+                      frame.NAtoms),)) for i_style in range(len(styles))])
+            while pending:
+                collect(pending.popleft(), styles)
+    except WorkerExit as err:
+        exit(err.args[0])
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+def collect(results: list[typing.Any],  # Results of the styles of a frame
+            styles: list[typing.Any]  # Styles with `accumulate`
+            ) -> None:
+    """wait for all the styles of the oldest frame and add its values"""
+    for result, style in zip(results, styles):
+        style.accumulate(result.get())
+
+
+def stitch(results: list[tuple[typing.Any, ...]]  # From parse_range
+           ) -> np.ndarray:
+    """copy the blocks into one array and free them"""
+    widths: set[int] = {shape[1] for _, shape, *_ in results
+                        if len(shape) > 1 and shape[0]}
+    if len(widths) > 1:
+        for name, *_ in results:
+            if name is not None:
+                free(name)
+        raise ValueError(f'Different number of columns: {sorted(widths)}')
+    width: int = widths.pop() if widths else 0
+    nrows: int = \
+        sum(shape[0] for name, shape, *_ in results if name is not None)
+    data: np.ndarray = np.empty((nrows, width), dtype=np.float64)
+    row: int = 0
+    for name, shape, *_ in results:
+        if name is None:
+            continue
+        shm = shared_memory.SharedMemory(name=name)
+        data[row:row + shape[0]] = \
+            np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        row += shape[0]
+        shm.close()
+        shm.unlink()
+    return data
+
+
+def free(name: str  # Name of a shared memory block
+         ) -> None:
+    shm = shared_memory.SharedMemory(name=name)
+    shm.close()
+    shm.unlink()
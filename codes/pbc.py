@@ -0,0 +1,129 @@
+import typing
+import numpy as np
+import atom_table
+
+
+class Doc:
+    """periodic boundary conditions for all the analyses
+    The box is orthogonal and its lengths come from Xlim, Ylim, and
+    Zlim of the data file (Header) or of a frame of the trajectory.
+    unwrap:
+        put back the atoms which crossed the box by their image flags,
+        x + nx * Lx, for whole columns at once
+    make_whole:
+        when there are no image flags (e.g., dump files with only x y z)
+        a molecule on the edge of the box is split; every atom is moved
+        to its nearest image to the first atom of its molecule, or to
+        the atom it is bonded to, for all the molecules at once
+    get_whole:
+        unwrap the atoms of some types, and make them whole only if
+        there were no image flags (`has_images` of the AtomTable); with
+        the flags a chain longer than half of the box is already whole,
+        and the minimum image would split it again
+    """
+
+
+def get_box(obj: typing.Any  # ReadData or a Frame, with Xlim, Ylim, Zlim
+            ) -> np.ndarray:
+    """get the box length in x, y, z direction"""
+    return np.array([np.abs(obj.Xlim[1] - obj.Xlim[0]),
+                     np.abs(obj.Ylim[1] - obj.Ylim[0]),
+                     np.abs(obj.Zlim[1] - obj.Zlim[0])], dtype=np.float64)
+
+
+def unwrap(atoms: atom_table.AtomTable,  # Atoms with xyz and images
+           box: np.ndarray,  # Length of the box in x, y, z
+           types: typing.Union[list[int], None] = None  # Types to unwrap
+           ) -> atom_table.AtomTable:
+    """apply the image flags to the coordinates, then set the flags to
+    zero
+    Without `types` all the atoms are unwrapped in place; with `types`
+    only the atoms of these types are copied and unwrapped, and returned
+    """
+    if types is not None:
+        atoms = atoms.select(types)
+    if atoms.images.any():
+        atoms.xyz += (atoms.images * box).astype(atoms.xyz.dtype)
+        atoms.images[:] = 0
+    return atoms
+
+
+def get_whole(obj: typing.Any,  # ReadData or a Frame, with the atoms
+              types: list[int],  # Types of the atoms of the molecules
+              bonds: bool = False  # Walk the Bonds of a data file
+              ) -> atom_table.AtomTable:
+    """return a copy of the atoms of the types with whole molecules
+    With `bonds` the Bonds of a data file (if there are) are walked by
+    make_whole, for chains; a frame of a trajectory has no bonds."""
+    box: np.ndarray = get_box(obj)  # Length of the box in x, y, z
+    atoms: atom_table.AtomTable = unwrap(obj.atoms, box, types)
+    if atoms.has_images:
+        return atoms
+    pairs: typing.Union[np.ndarray, None] = None  # ai, aj of the bonds
+    if bonds and hasattr(obj, 'Bonds_df'):
+        pairs = obj.Bonds_df[['ai', 'aj']].to_numpy(dtype=np.int64)
+    return make_whole(atoms, box, pairs)
+
+
+def min_image(vec: np.ndarray,  # Vectors between atoms, one in each row
+              box: np.ndarray  # Length of the box in x, y, z
+              ) -> np.ndarray:
+    """return the nearest image of the vectors"""
+    return vec - box * np.round(vec / box)
+
+
+def make_whole(atoms: atom_table.AtomTable,  # Atoms with mol and xyz
+               box: np.ndarray,  # Length of the box in x, y, z
+               bonds: typing.Union[np.ndarray, None] = None  # ai, aj ids
+               ) -> atom_table.AtomTable:
+    """make every molecule whole by the minimum image convention
+    Without `bonds` each atom is moved next to the first atom of its
+    molecule (by atom id), which is right if the molecules are smaller
+    than half of the box. With `bonds` (Mx2 array of atom ids) the
+    molecules are walked along their bonds, one bond further from the
+    first atoms in each step, so long chains are also made whole.
+    The coordinates are changed in place and the atoms are returned."""
+    xyz: np.ndarray = atoms.xyz.astype(np.float64)
+    index: atom_table.MolIndex = atoms.mol_index
+    first: np.ndarray  # Index of the first atom of each row's molecule
+    first = np.empty(len(atoms), dtype=np.int64)
+    first[index.order] = index.repeat(index.order[index.starts])
+    if bonds is None:
+        xyz = xyz[first] + min_image(xyz - xyz[first], box)
+    else:
+        xyz = walk_bonds(atoms.atom_id, xyz, first, bonds, box)
+    atoms.xyz[:] = xyz
+    return atoms
+
+
+def walk_bonds(atom_id: np.ndarray,  # Id of the atoms
+               xyz: np.ndarray,  # Coordinates of the atoms
+               first: np.ndarray,  # Index of the first atom of molecules
+               bonds: np.ndarray,  # Pairs of the bonded atoms ids
+               box: np.ndarray  # Length of the box in x, y, z
+               ) -> np.ndarray:
+    """place the atoms along the bonds, starting from the first atom of
+    each molecule; atoms which are not reached by any bond are put
+    next to the first atom of their molecule"""
+    index: np.ndarray = np.full(atom_id.max() + 1, -1, dtype=np.int64)
+    index[atom_id] = np.arange(len(atom_id))
+    bonds = bonds[(bonds.max(axis=1) <= atom_id.max())]
+    pairs: np.ndarray = index[bonds]
+    pairs = pairs[(pairs >= 0).all(axis=1)]
+    # Both directions of the bonds: from placed atom to the other one
+    pairs = np.vstack((pairs, pairs[:, ::-1]))
+    placed: np.ndarray = np.zeros(len(atom_id), dtype=bool)
+    placed[first] = True
+    xyz = xyz.copy()
+    while True:
+        step: np.ndarray = pairs[placed[pairs[:, 0]] & ~placed[pairs[:, 1]]]
+        if not len(step):
+            break
+        _, uniq = np.unique(step[:, 1], return_index=True)
+        step = step[uniq]
+        xyz[step[:, 1]] = xyz[step[:, 0]] + \
+            min_image(xyz[step[:, 1]] - xyz[step[:, 0]], box)
+        placed[step[:, 1]] = True
+    rest: np.ndarray = np.flatnonzero(~placed)
+    xyz[rest] = xyz[first[rest]] + min_image(xyz[rest] - xyz[first[rest]], box)
+    return xyz
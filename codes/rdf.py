@@ -0,0 +1,126 @@
+import typing
+import numpy as np
+import pandas as pd
+import stats
+import neighbors
+import atom_table
+import get_prompt
+import read_json as rejs
+import read_lmp_data as relmp
+from colors_text import TextColor as bcolors
+
+
+class Doc:
+    """radial distribution function between two groups of atoms
+    The groups are the names in the `atoms` key: with one name (e.g.,
+    `atoms = O`) the g(r) of the atoms with themselves, with two names
+    (e.g., `atoms = CH3 O`) the g(r) of the second ones around the
+    first ones. The pairs closer than `cutoff` (default 10 A) are found
+    with a cell list (neighbors.CellList), so the memory does not grow
+    with N^2, and their distances are added to a histogram, frame by
+    frame.
+        g(r) = <n(r)> / (rho_b 4 pi r^2 dr)
+    where <n(r)> is the number of the B atoms in the shell around an A
+    atom, and rho_b = N_b / V (N_b - 1 for one group) of each frame.
+    The coordination number is the running sum of <n(r)>:
+        CN(r) = rho_b int_0^r g(s) 4 pi s^2 ds
+    Output:
+        rdf.txt: r, g(r), CN(r) for each bin
+    """
+
+
+class Rdf:
+    """accumulate the distances of the pairs over the frames"""
+    NBINS: int = 200  # Number of the bins of r
+    CUTOFF: float = 10.0  # Default largest r
+
+    def __init__(self,
+                 files: get_prompt.Prompts  # All the infos in the prompt file
+                 ) -> None:
+        print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
+              f'\tGetting radial distribution function{bcolors.ENDC}')
+        param = rejs.ReadJson(files.jname)  # Name of atoms in the JSON file
+        self.group_a, self.group_b = self.get_types(param.df, files.atoms)
+        self.same: bool = self.group_a == self.group_b  # One group
+        self.types: list[int] = sorted(set(self.group_a + self.group_b))
+        self.names: list[str] = files.atoms
+        self.cutoff: float = files.cutoff or self.CUTOFF
+        self.cells = neighbors.CellList(self.cutoff)
+        self.nframes: int = 0  # Number of the frames
+        self.hist = stats.Histogram((self.NBINS,), ((0.0, self.cutoff),))
+        self.n_a: int = 0  # Sum of the A atoms of all the frames
+        self.norm: float = 0.0  # Sum of N_a * rho_b of all the frames
+
+    def get_types(self,
+                  df: pd.DataFrame,  # Name and type of atoms in JSON file
+                  atoms: list[str]  # One or two names from the input
+                  ) -> tuple[list[int], list[int]]:
+        """return the types of the A and B groups"""
+        param_atoms: list[str] = list(df['name'])  # Type of atoms in jname
+        if not all(x in param_atoms for x in atoms):
+            exit(f'\t{bcolors.FAIL}Error! There is no type for one or'
+                 f' more of atoms: `{atoms}` in json file{bcolors.ENDC}\n')
+        if len(atoms) > 2:
+            exit(f'\t{bcolors.FAIL}Error! rdf needs one or two names in '
+                 f'`atoms`, but got: `{atoms}`{bcolors.ENDC}\n')
+        groups: list[list[int]] = \
+            [[int(df.loc[df['name'] == atom]['typ'].iloc[0])]
+             for atom in atoms]
+        return groups[0], groups[-1]
+
+    def analyse(self,
+                obj: relmp.ReadData  # Data file or a frame of trajectory
+                ) -> dict[str, typing.Any]:
+        """return the histogram of the distances of this snapshot"""
+        group_a: atom_table.AtomTable = obj.atoms.select(self.group_a)
+        group_b: typing.Union[atom_table.AtomTable, None] = None
+        self.cells.set_box(obj)
+        if self.same:
+            _, _, r = self.cells.pairs(group_a.xyz)
+            n_b: int = len(group_a) - 1
+        else:
+            group_b = obj.atoms.select(self.group_b)
+            _, _, r = self.cells.pairs(group_a.xyz, group_b.xyz)
+            n_b = len(group_b)
+        hist = stats.Histogram(self.hist.bins, self.hist.ranges)
+        hist.add(r)
+        volume: float = float(np.prod(self.cells.box))
+        return dict(hist=hist, n_a=len(group_a),
+                    norm=len(group_a) * n_b / volume)
+
+    def accumulate(self,
+                   values: dict[str, typing.Any]  # From `analyse`
+                   ) -> None:
+        """add the histogram of one snapshot to the sums"""
+        self.hist.merge(values['hist'])
+        self.n_a += values['n_a']
+        self.norm += values['norm']
+        self.nframes += 1
+
+    def get_gr(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """return r, g(r) and CN(r) of all the frames"""
+        edges: np.ndarray = self.hist.edges()
+        shell: np.ndarray = 4.0 / 3.0 * np.pi * (edges[1:]**3 - edges[:-1]**3)
+        counts: np.ndarray = self.hist.counts.astype(np.float64)
+        if self.same:
+            counts *= 2.0  # Each pair is counted once for both atoms
+        g_r: np.ndarray = counts / (self.norm * shell) if self.norm else \
+            np.zeros(len(counts))
+        cn_r: np.ndarray = np.cumsum(counts) / max(self.n_a, 1)
+        return self.hist.centers(), g_r, cn_r
+
+    def print_results(self,
+                      fname: str = 'rdf.txt'  # Name of the output file
+                      ) -> None:
+        """print the first peak and write g(r) and CN(r)"""
+        r, g_r, cn_r = self.get_gr()
+        peak: int = int(np.argmax(g_r))
+        np.savetxt(fname, np.column_stack((r, g_r, cn_r)),
+                   fmt=['%.4f', '%.6f', '%.6f'],
+                   header=f'r [A], g(r), CN(r); '
+                          f'{" - ".join(self.names)}; '
+                          f'frames: {self.nframes}')
+        print(f'{bcolors.OKGREEN}\tNumber of frames = {self.nframes}\n'
+              f'\tFirst peak of g(r) = {g_r[peak]:.4f} at r = '
+              f'{r[peak]:.4f} [A], CN = {cn_r[peak]:.4f}{bcolors.ENDC}')
+        print(f'{bcolors.OKCYAN}\tWrote: `{fname}`{bcolors.ENDC}\n')
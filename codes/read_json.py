@@ -1,4 +1,6 @@
 import json
+import typing
+import numpy as np
 import pandas as pd
 from colors_text import TextColor as bcolors
 
@@ -9,7 +11,8 @@ class Doc:
         is a file with same name as the main data file of LAMMPS which
         is json written by the combination code.
     Output:
-        type and name of the atoms
+        type and name of the atoms, and their masses by type (used for
+        trajectories, which have no Masses section)
         """
 
 
@@ -32,6 +35,16 @@ class ReadJson:
         del data
         return df
 
+    def get_masses(self) -> typing.Union[np.ndarray, None]:
+        """return the mass of each type, indexed by the type, or None if
+        there are no masses in the file"""
+        if 'mass' not in self.df:
+            return None
+        typ: np.ndarray = self.df['typ'].to_numpy(dtype=np.int64)
+        masses: np.ndarray = np.zeros(typ.max() + 1, dtype=np.float64)
+        masses[typ] = self.df['mass'].to_numpy(dtype=np.float64)
+        return masses
+
     def capitaliz_names(self,
                         df: pd.DataFrame  # DataFrame of the atoms name,...
                         ) -> pd.DataFrame:
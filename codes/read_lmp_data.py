@@ -1,6 +1,14 @@
+import os
+import re
 import sys
+import json
+import mmap
 import typing
+import functools
+import numpy as np
 import pandas as pd
+import parallel
+import atom_table
 from colors_text import TextColor as bcolors
 
 
@@ -11,6 +19,70 @@ class FileErr:
     """
 
 
+def load_atoms(lines: list[str],  # Lines of the Atoms section
+               ncols: int,  # Number of the columns without image flags
+               types: typing.Union[list[int], None] = None,  # Wanted types
+               z_col: int = -1,  # Column of the z in the lines
+               zrange: typing.Union[tuple[float, float], None] = None
+               ) -> np.ndarray:
+    """parse the lines of the wanted atoms at once
+    The lines are tokenised in one call of `np.loadtxt`, comments after
+    `#` are dropped, and if the image flags are not written they are
+    set to zero."""
+    data: np.ndarray  # All the numbers in the lines, one row per atom
+    lines = atom_table.keep_lines(lines, 2, types, z_col, zrange)
+    try:
+        data = np.loadtxt(lines, comments='#', ndmin=2) if lines \
+            else np.zeros((0, ncols))
+    except ValueError:
+        # Some of the lines have image flags and some do not
+        data = pad_atoms(lines, ncols)
+    if data.shape[1] == ncols:
+        data = np.hstack((data, np.zeros((data.shape[0], 3))))
+    return data
+
+
+def pad_atoms(lines: list[str],  # Raw lines of the Atoms section
+              ncols: int  # Number of the columns without image flags
+              ) -> np.ndarray:
+    """slow path for a section with and without image flags mixed"""
+    rows: list[list[str]] = []  # tokens of each line with image flags
+    for line in lines:
+        line = line.split('#')[0].split()
+        if line:
+            rows.append((line + ['0', '0', '0'])[:ncols + 3])
+    return np.array(rows, dtype=np.float64)
+
+
+def load_rows(lines: list[str],  # Lines of a section of the body
+              ncols: int  # Number of the columns to read, with the id
+              ) -> np.ndarray:
+    """parse the first columns of the lines in one call"""
+    if not lines:
+        return np.zeros((0, ncols))
+    return np.loadtxt(lines, comments='#', ndmin=2, usecols=range(ncols),
+                      dtype=np.float64)
+
+
+def load_comments(lines: list[str],  # Lines of a section of the body
+                  ncols: int  # Number of the columns to read, with the id
+                  ) -> tuple[np.ndarray, list[str]]:
+    """parse the first columns of the lines, and the comment after `#`
+    of each line ('' if there is none)"""
+    return (load_rows(lines, ncols),
+            [line.partition('#')[2].strip() for line in lines])
+
+
+def set_comments(df: pd.DataFrame,  # Rows of a section of the body
+                 names: typing.Sequence[str]  # Comment of each row or ''
+                 ) -> None:
+    """add the `cmt` and `name` columns; rows without a comment have
+    NaN in both, as the lines of the section may or may not have one"""
+    df['cmt'] = '#'
+    df['name'] = pd.Series(names, index=df.index, dtype=object)
+    df.loc[df['name'] == '', ['cmt', 'name']] = np.nan
+
+
 class Header:
     """
     read haeder of the data file
@@ -34,128 +106,164 @@ class Header:
         self.infile: str = infile
         print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
               f'\tReading: `{self.infile}`{bcolors.ENDC}\n')
-        self.atomsLine: int
-        self.atomsLine = self.check_file()
+        self.index_file()
         self.read_header()
 
-    def check_file(self) -> int:
-        """ Check header
+    def index_file(self) -> None:
+        """ Index the file in a single pass
         input:
             - INFILE (lammps data file)
         output:
-            - number of header lines
+            - Sections: byte offset, number of bytes and number of lines
+              of every section (Masses, ..., Atoms, ..., Dihedrals)
+            - Titles: the title line of every section
+        The header (before the first section) is kept to be parsed by
+        read_header, and the readers of the sections seek straight to
+        their offset.
         """
-        # An integer to prevent over-reading in case of headers bugs
-        MAXHEADER: int = 1000
-        # track the number of lines in the hedaer
-        linecount: int = 0
-        with open(self.infile, 'r') as f:
+        CHUNK: int = 1 << 26  # Bytes to read in every step of the scan
+        title_re: re.Pattern = re.compile(rb'\n[A-Z][^\n]*')
+        titles: list[tuple[str, int, int]] = []  # Title, start, data offset
+        base: int = 0  # Offset of the buffer in the file
+        tail: bytes = b''  # Part of the last line of the previous chunk
+        with open(self.infile, 'rb') as f:
             while True:
-                linecount += 1
-                line = f.readline()
-                if line.strip().startswith('Atoms'):
-                    atomsLine = linecount
+                chunk = f.read(CHUNK)
+                buf = tail + chunk
+                if not buf:
+                    break
+                cut = buf.rfind(b'\n') if chunk else len(buf)
+                if cut <= 0:
+                    tail = buf
+                    continue
+                for match in title_re.finditer(buf, 0, cut):
+                    titles.append((match.group()[1:].decode().strip(),
+                                   base + match.start() + 1,
+                                   base + match.end() + 1))
+                if not chunk:
                     break
-                if linecount > MAXHEADER:
-                    err = FileErr()
-                    exit(err.__doc__)
-                if not line:
-                    exit(f'{bcolors.FAIL}{self.__class__.__name__}'
-                         f'wrong data file{bcolors.ENDC}\n'
-                         f'{self.__class__.__doc__}\n')
-        return atomsLine
+                base += cut
+                tail = buf[cut:]
+            fsize: int = f.tell()
+            if not titles:
+                exit(f'{bcolors.FAIL}{self.__class__.__name__}'
+                     f'wrong data file{bcolors.ENDC}\n'
+                     f'{self.__class__.__doc__}\n')
+            f.seek(0)
+            self.header_lines: list[str] = \
+                f.read(titles[0][1]).decode().splitlines()
+        self.Sections: dict[str, tuple[int, int, int]] = dict()
+        self.Titles: dict[str, str] = dict()
+        ends: list[int] = [item[1] for item in titles[1:]] + [fsize]
+        for (title, _, offset), end in zip(titles, ends):
+            name = title.split('#')[0].strip()
+            self.Titles[name] = title
+            self.Sections[name] = (offset, max(end - offset, 0), -1)
+        if 'Atoms' not in self.Sections:
+            err = FileErr()
+            exit(err.__doc__)
+        self.open_map()
+
+    def open_map(self) -> None:
+        """memory-map the file, the sections are read as views of it"""
+        with open(self.infile, 'rb') as f:
+            self.mm: mmap.mmap = mmap.mmap(f.fileno(), 0,
+                                           access=mmap.ACCESS_READ)
+
+    def read_section(self,
+                     name: str  # Name of the section, e.g. `Atoms`
+                     ) -> list[str]:
+        """seek to the section and return its non-empty lines"""
+        offset: int  # Byte offset of the first line after the title
+        nbytes: int  # Length of the section in bytes
+        if name not in self.Sections:
+            return []
+        offset, nbytes, _ = self.Sections[name]
+        lines = self.mm[offset:offset + nbytes].decode().splitlines()
+        return [line for line in lines if line.strip()]
 
     def read_header(self) -> None:
         """read header to get all the available info
-        Read header now and get the data
+        The keywords are in the header lines, and the coefficients are
+        read from their sections by seeking to them
         """
         # Setting dictionaries to save data of each block in the header
         self.set_attrs()
         self.set_attr_zero()
-        # Setting flags to save data correctly
-        Masses, PairCoeff, BondCoeff, AngleCoeff, DihedralCoeff, Atoms\
-            = False, False, False, False, False, False
-        # Track the number of lines
-        linecount: int = 0
-        with open(self.infile, 'r') as f:
-            while True:
-                linecount += 1
-                if linecount > self.atomsLine:
-                    break
-                line: str = f.readline()
-                if line.strip().endswith("atoms"):
-                    self.NAtoms = int(line.strip().split(' ')[0])
-
-                elif line.strip().endswith("atom types"):
-                    self.NAtomTyp = int(line.strip().split(' ')[0])
-
-                elif line.strip().endswith("bonds"):
-                    self.NBonds = int(line.strip().split(' ')[0])
-
-                elif line.strip().endswith("bond types"):
-                    self.NBondTyp = int(line.strip().split(' ')[0])
-
-                elif line.strip().endswith("angles"):
-                    self.NAngles = int(line.strip().split(' ')[0])
-
-                elif line.strip().endswith("angle types"):
-                    self.NAngleTyp = int(line.strip().split(' ')[0])
-
-                elif line.strip().endswith("dihedrals"):
-                    self.NDihedrals = int(line.strip().split(' ')[0])
-
-                elif line.strip().endswith("dihedral types"):
-                    self.NDihedralTyp = int(line.strip().split(' ')[0])
-
-                elif line.strip().endswith("xhi"):
-                    self.Xlim = self.get_axis_lim(line.strip().split('xlo')[0])
-
-                elif line.strip().endswith("yhi"):
-                    self.Ylim = self.get_axis_lim(line.strip().split('ylo')[0])
-
-                elif line.strip().endswith("zhi"):
-                    self.Zlim = self.get_axis_lim(line.strip().split('zlo')[0])
-
-                # setting up Flages for reading the cards of data in the file
-                elif line.strip().startswith("Masses"):
-                    Masses, PairCoeff, BondCoeff, AngleCoeff, DihedralCoeff,\
-                        Atoms = True, False, False, False, False, False
-
-                elif line.strip().startswith("Pair"):
-                    Masses, PairCoeff, BondCoeff, AngleCoeff, DihedralCoeff,\
-                        Atoms = False, True, False, False, False, False
-
-                elif line.strip().startswith("Bond Coeffs"):
-                    Masses, PairCoeff, BondCoeff, AngleCoeff, DihedralCoeff,\
-                        Atoms = False, False, True, False, False, False
-
-                elif line.strip().startswith("Angle Coeffs"):
-                    Masses, PairCoeff, BondCoeff, AngleCoeff, DihedralCoeff,\
-                        Atoms = False, False, False, True, False, False
-
-                elif line.strip().startswith("Dihedral Coeffs"):
-                    Masses, PairCoeff, BondCoeff, AngleCoeff, DihedralCoeff,\
-                        Atoms = False, False, False, False, True, False
-
-                elif line.strip().startswith("Atoms"):
-                    Masses, PairCoeff, BondCoeff, AngleCoeff, DihedralCoeff,\
-                        Atoms = False, False, False, False, False, True
-
-                elif line.strip():
-                    if Masses:
-                        self.get_masses(line.strip(), 'Masses')
-                    elif PairCoeff:
-                        self.get_pair_coeff(line.strip(), 'Pair')
-                    elif BondCoeff:
-                        self.get_bond_coeff(line.strip(), 'Bond')
-                    elif AngleCoeff:
-                        self.get_angle_coeff(line.strip(), 'Angle')
-                    elif DihedralCoeff:
-                        self.get_dihedral_coeff(line.strip(), 'Dihedral')
-                if Atoms:
-                    break
-                if not line:
-                    break
+        for line in self.header_lines[1:]:
+            if line.strip():
+                self.get_header_keys(line.strip())
+        del self.header_lines
+        self.set_section_lines()
+        for line in self.read_section('Masses'):
+            self.get_masses(line.strip(), 'Masses')
+        for name in self.Sections:
+            if name.startswith('Pair'):
+                for line in self.read_section(name):
+                    self.get_pair_coeff(line.strip(), 'Pair')
+        for line in self.read_section('Bond Coeffs'):
+            self.get_bond_coeff(line.strip(), 'Bond')
+        for line in self.read_section('Angle Coeffs'):
+            self.get_angle_coeff(line.strip(), 'Angle')
+        for line in self.read_section('Dihedral Coeffs'):
+            self.get_dihedral_coeff(line.strip(), 'Dihedral')
+
+    def get_header_keys(self,
+                        line: str  # A stripped line from the header
+                        ) -> None:
+        """set the numbers and box size from a line of the header"""
+        if line.endswith("atoms"):
+            self.NAtoms = int(line.split(' ')[0])
+
+        elif line.endswith("atom types"):
+            self.NAtomTyp = int(line.split(' ')[0])
+
+        elif line.endswith("bonds"):
+            self.NBonds = int(line.split(' ')[0])
+
+        elif line.endswith("bond types"):
+            self.NBondTyp = int(line.split(' ')[0])
+
+        elif line.endswith("angles"):
+            self.NAngles = int(line.split(' ')[0])
+
+        elif line.endswith("angle types"):
+            self.NAngleTyp = int(line.split(' ')[0])
+
+        elif line.endswith("dihedrals"):
+            self.NDihedrals = int(line.split(' ')[0])
+
+        elif line.endswith("dihedral types"):
+            self.NDihedralTyp = int(line.split(' ')[0])
+
+        elif line.endswith("xhi"):
+            self.Xlim = self.get_axis_lim(line.split('xlo')[0])
+
+        elif line.endswith("yhi"):
+            self.Ylim = self.get_axis_lim(line.split('ylo')[0])
+
+        elif line.endswith("zhi"):
+            self.Zlim = self.get_axis_lim(line.split('zlo')[0])
+
+    def set_section_lines(self) -> None:
+        """set the number of lines of each section from the header"""
+        nlines: dict[str, int] = {
+            'Masses': self.NAtomTyp,
+            'Pair Coeffs': self.NAtomTyp,
+            'Bond Coeffs': self.NBondTyp,
+            'Angle Coeffs': self.NAngleTyp,
+            'Dihedral Coeffs': self.NDihedralTyp,
+            'Atoms': self.NAtoms,
+            'Velocities': self.NAtoms,
+            'Bonds': self.NBonds,
+            'Angles': self.NAngles,
+            'Dihedrals': self.NDihedrals}
+        for name, (offset, nbytes, _) in self.Sections.items():
+            if name in nlines:
+                self.Sections[name] = (offset, nbytes, nlines[name])
+            else:
+                self.Sections[name] = \
+                    (offset, nbytes, len(self.read_section(name)))
 
     def set_attrs(self) -> None:
         self.Names: dict[int, str] = dict()
@@ -248,115 +356,167 @@ class Body(Header):
     """
     read the data for atoms, velocities, bonds, angles, dihedrals
     It needs the names of the atoms read by HEADER class
+    Only the atoms are read at the start; velocities, bonds, angles
+    and dihedrals are parsed from the memory-mapped file the first
+    time they are asked for.
+    If there is a binary cache of the file (DataCache), the header and
+    atoms are loaded from it and the text is not read; a section which
+    is not in the cache yet is parsed from the text when it is asked
+    for, and added to the cache.
+    The index of the molecules (atoms.mol_index) is made once and is
+    shared by all the analyses; it is also kept in the cache.
+    With `types` and/or `zrange` (lo <= z < hi, wrapped z) only these
+    atoms are kept. Without the cache only their lines are parsed; with
+    it the whole Atoms section is parsed once for the cache, since it
+    must have all the atoms, and the atoms are taken from it. If the
+    cache cannot be written, the file is read as without it. The cache
+    keeps the coordinates in float64 and they are cast to `dtype` when
+    loaded.
+    With `nworkers` > 1 the sections are split into ranges of lines
+    which are parsed by a pool of processes (parallel.parse_section).
     """
 
-    def __init__(self, infile) -> None:
-        super().__init__(infile)
+    def __init__(self,
+                 infile: str,  # name for the IO file
+                 dtype: type = np.float64,  # Type of the coordinates
+                 cache: bool = True,  # Use and write the binary cache
+                 types: typing.Union[list[int], None] = None,  # Wanted
+                 zrange: typing.Union[tuple[float, float], None] = None,
+                 nworkers: int = 1  # Number of the processes to parse
+                 ) -> None:
         self.infile: str = infile  # name for the IO file
-        self.read_body()
+        self.dtype: type = dtype
+        self.nworkers: int = nworkers
+        self.types: typing.Union[list[int], None] = types
+        self.zrange: typing.Union[tuple[float, float], None] = zrange
+        self.cache: typing.Union[DataCache, None] = None  # Loaded cache
+        data_cache: DataCache = DataCache(infile)
+        if cache and data_cache.load(self):
+            self.cache = data_cache
+            self.atoms = self.filter_atoms(self.atoms)
+        elif cache and data_cache.writable():
+            # The cache has all the atoms in full precision, for any run
+            self.types, self.zrange, self.dtype = None, None, np.float64
+            super().__init__(infile)
+            self.read_body()
+            if data_cache.save(self):
+                self.cache = data_cache
+            self.types, self.zrange, self.dtype = types, zrange, dtype
+            self.atoms.xyz = self.atoms.xyz.astype(dtype, copy=False)
+            self.atoms = self.filter_atoms(self.atoms)
+        else:
+            super().__init__(infile)
+            self.read_body()
 
     def read_body(self):
-        self.Atoms, self.Velocities, self.Bonds, self.Angles, self.Dihedrals\
-            = dict(), dict(), dict(), dict(), dict()
-        Atoms, Velocities, Bonds, Angles, Dihedrals\
-            = False, False, False, False, False
         self.q_flag: bool = False  # if there are charges in rows
-
-        with open(self.infile, 'r') as f:
-            while True:
-                line = f.readline()
-                if line.strip().startswith('Atoms'):
-                    Atoms, Velocities, Bonds, Angles, Dihedrals\
-                        = True, False, False, False, False
-                    self.q_flag = self.get_atom_style(line)
-                elif line.strip().startswith('Velocities'):
-                    Atoms, Velocities, Bonds, Angles, Dihedrals\
-                        = False, True, False, False, False
-                elif line.strip().startswith('Bonds'):
-                    Atoms, Velocities, Bonds, Angles, Dihedrals\
-                        = False, False, True, False, False
-                elif line.strip().startswith('Angles'):
-                    Atoms, Velocities, Bonds, Angles, Dihedrals\
-                        = False, False, False, True, False
-                elif line.strip().startswith('Dihedrals'):
-                    Atoms, Velocities, Bonds, Angles, Dihedrals\
-                        = False, False, False, False, True
-                elif line.strip():
-                    if Atoms:
-                        self.get_atoms(line.strip())
-                    elif Velocities:
-                        self.get_velocities(line.strip())
-                    elif Bonds:
-                        self.get_bonds(line.strip())
-                    elif Angles:
-                        self.get_angles(line.strip())
-                    elif Dihedrals:
-                        self.get_dihedrals(line.strip())
-                if not line:
-                    break
-            self.Atoms_df = pd.DataFrame.from_dict(
-                            self.Atoms, orient='columns').T
-            self.Bonds_df = pd.DataFrame.from_dict(self.Bonds).T
-            self.Angles_df = pd.DataFrame.from_dict(self.Angles).T
-            self.Dihedrals_df = pd.DataFrame.from_dict(self.Dihedrals).T
-            self.Masses_df = self.set_masses()
-            del self.Atoms, self.Bonds, self.Angles, self.Dihedrals
-
-    def get_atoms(self, line) -> None:
-        # stting the nth row of the dictionary
+        self.q_flag = self.get_atom_style(self.Titles['Atoms'])
+        i_col: int = 3 if self.q_flag else 2  # Column before x
+        self.atoms: atom_table.AtomTable = self.get_atoms(
+            self.section_rows('Atoms', load_atoms, i_col + 4, self.types,
+                              i_col + 3, self.zrange))
+        self.Masses_df = self.set_masses()
+
+    @functools.cached_property
+    def Atoms_df(self) -> pd.DataFrame:
+        """atoms as a DataFrame, indexed by the atom id, with the same
+        columns as the `Atoms` section to write them out"""
+        df: pd.DataFrame = self.atoms.to_df()
+        df.insert(len(df.columns) - 1 if 'name' in df else len(df.columns),
+                  'cmt', '#')
+        return df
+
+    @functools.cached_property
+    def Velocities_df(self) -> pd.DataFrame:
+        """velocities of the atoms, indexed by the atom id"""
+        return self.cached_df('Velocities', self.get_velocities)
+
+    @functools.cached_property
+    def Bonds_df(self) -> pd.DataFrame:
+        """bonds of the system, indexed by the bond id"""
+        return self.cached_df('Bonds', self.get_bonds)
+
+    @functools.cached_property
+    def Angles_df(self) -> pd.DataFrame:
+        """angles of the system, indexed by the angle id"""
+        return self.cached_df('Angles', self.get_angles)
+
+    @functools.cached_property
+    def Dihedrals_df(self) -> pd.DataFrame:
+        """dihedrals of the system, indexed by the dihedral id"""
+        return self.cached_df('Dihedrals', self.get_dihedrals)
+
+    def cached_df(self,
+                  name: str,  # Name of the section, e.g. `Bonds`
+                  parse: typing.Callable[[], pd.DataFrame]  # Its parser
+                  ) -> pd.DataFrame:
+        """the section from the cache, or parsed and added to it"""
+        if self.cache is None:
+            return parse()
+        if self.cache.has(name):
+            return self.cache.get_df(name)
+        if not hasattr(self, 'Sections'):
+            # Loaded from the cache, the text is indexed only now
+            self.index_file()
+            del self.header_lines
+        df: pd.DataFrame = parse()
+        self.cache.add(name, df)
+        return df
+
+    def section_rows(self,
+                     name: str,  # Name of the section, e.g. `Atoms`
+                     parser: typing.Callable[..., typing.Any],  # To parse
+                     *args: typing.Any  # Other arguments of the parser
+                     ) -> typing.Any:
+        """parse the lines of the section, in parallel if asked; return
+        what the parser returns"""
+        try:
+            if self.nworkers < 2 or name not in self.Sections:
+                return parser(self.read_section(name), *args)
+            offset, nbytes, _ = self.Sections[name]
+            return parallel.parse_section(
+                self.infile, offset, nbytes, self.nworkers, parser, *args)
+        except ValueError as err:
+            exit(f'{bcolors.FAIL}{self.__class__.__name__}: Wrong number of '
+                 f'columns in the `{name}` section: {err}{bcolors.ENDC}\n')
+
+    def get_atoms(self,
+                  data: np.ndarray  # Numbers of the Atoms, one row per atom
+                  ) -> atom_table.AtomTable:
+        """put the columns of the Atoms section in a typed table"""
         i_col: int  # to count the column if there is or not charge cols
-        if 'Atoms' not in line:
-            line = line.split()
-            line = [item for item in line if item]
-            atom_id = int(line[0])
-            i_mol = int(line[1])
-            i_typ = int(line[2])
-            if self.q_flag:
-                i_charge = float(line[3])
-                i_col = 3
-            else:
-                i_col = 2
-            i_x = float(line[i_col + 1])
-            i_y = float(line[i_col + 2])
-            i_z = float(line[i_col + 3])
-            i_name = self.Names[i_typ]
-            try:
-                i_nx = int(line[i_col + 4])
-                i_ny = int(line[i_col + 5])
-                i_nz = int(line[i_col + 6])
-            except (ValueError, IndexError) as e:
-                i_nx = 0
-                i_ny = 0
-                i_nz = 0
-            if self.q_flag:
-                self.Atoms[atom_id] = dict(
-                                           atom_id=atom_id,
-                                           mol=i_mol,
-                                           typ=i_typ,
-                                           charge=i_charge,
-                                           x=i_x,
-                                           y=i_y,
-                                           z=i_z,
-                                           nx=i_nx,
-                                           ny=i_ny,
-                                           nz=i_nz,
-                                           cmt='#',
-                                           name=i_name
-                                          )
-            else:
-                self.Atoms[atom_id] = dict(
-                                           atom_id=atom_id,
-                                           mol=i_mol,
-                                           typ=i_typ,
-                                           x=i_x,
-                                           y=i_y,
-                                           z=i_z,
-                                           nx=i_nx,
-                                           ny=i_ny,
-                                           nz=i_nz,
-                                           cmt='#',
-                                           name=i_name
-                                          )
+        ncols: int  # Number of the columns without image flags
+        i_col = 3 if self.q_flag else 2
+        ncols = i_col + 4
+        if not len(data):
+            data = np.zeros((0, ncols + 3))
+        if data.shape[1] != ncols + 3:
+            exit(f'{bcolors.FAIL}{self.__class__.__name__}: Wrong number of '
+                 f'columns in the `Atoms` section: {data.shape[1]}'
+                 f'{bcolors.ENDC}\n')
+        atoms = atom_table.AtomTable(
+            atom_id=data[:, 0],
+            mol=data[:, 1],
+            typ=data[:, 2],
+            xyz=data[:, i_col + 1:i_col + 4],
+            images=data[:, i_col + 4:i_col + 7],
+            charge=data[:, 3] if self.q_flag else None,
+            names=self.Names,
+            dtype=self.dtype,
+            has_images=self.has_images(ncols))
+        del data
+        return atoms
+
+    def filter_atoms(self,
+                     atoms: atom_table.AtomTable  # All the atoms
+                     ) -> atom_table.AtomTable:
+        """keep the atoms of `types` and in `zrange`, e.g., from cache"""
+        keep: np.ndarray = np.ones(len(atoms), dtype=bool)
+        if self.types is not None:
+            keep &= np.isin(atoms.typ, self.types)
+        if self.zrange is not None:
+            keep &= (atoms.z >= self.zrange[0]) & (atoms.z < self.zrange[1])
+        return atoms if keep.all() else atoms.take(keep)
 
     def get_atom_style(self, line: str) -> bool:
         """return atom style for the atoms informations
@@ -375,91 +535,81 @@ class Body(Header):
             flag = True
         return flag
 
-    def get_velocities(self, line) -> None:
-        # stting the nth row of the dictionary
-        if 'Velocities' not in line:
-            line = line.split()
-            line = [item for item in line if item]
-            atom_id = int(line[0])
-            i_vx = float(line[1])
-            i_vy = float(line[2])
-            i_vz = float(line[3])
-            self.Velocities[atom_id] = dict(
-                                             vx=i_vx,
-                                             vy=i_vy,
-                                             vz=i_vz
-                                            )
-
-    def get_bonds(self, line) -> None:
-        # stting the nth row of the dictionary
-        cmt_flag: bool = False
-        if 'Bonds' not in line:
-            if '#' in line:
-                cmt_flag = True
-            line = line.split()
-            line = [item for item in line]
-            line = [item for item in line if item]
-            line[:4] = [int(item) for item in line[:4]]
-            bond_id = line[0]
-            i_typ = int(line[1])
-            i_ai = int(line[2])
-            i_aj = int(line[3])
-            if cmt_flag:
-                i_cmt = line[4]
-                i_name = line[5]
-                self.Bonds[bond_id] = dict(
-                                           typ=i_typ,
-                                           ai=i_ai,
-                                           aj=i_aj,
-                                           cmt=i_cmt,
-                                           name=i_name
-                                          )
-            else:
-                self.Bonds[bond_id] = dict(
-                                           typ=i_typ,
-                                           ai=i_ai,
-                                           aj=i_aj
-                                           )
-
-    def get_angles(self, line) -> None:
-        # stting the nth row of the dictionary
-        if "Angles" not in line:
-            if '#' in line:
-                line = line.split('#')[0]
-            line = line.split()
-            line = [int(item) for item in line if item]
-            angle_id = line[0]
-            i_typ = int(line[1])
-            i_ai = int(line[2])
-            i_aj = int(line[3])
-            i_ak = int(line[4])
-            self.Angles[angle_id] = dict(
-                                         typ=i_typ,
-                                         ai=i_ai,
-                                         aj=i_aj,
-                                         ak=i_ak
-                                        )
-
-    def get_dihedrals(self, line) -> None:
-        # stting the nth row of the dictionary
-        if "Dihedrals" not in line:
-            if '#' in line:
-                line = line.split('#')[0]
-            line = line.split()
-            line = [int(item) for item in line if item]
-            dihedrals_id = line[0]
-            i_typ = int(line[1])
-            i_ai = int(line[2])
-            i_aj = int(line[3])
-            i_ak = int(line[4])
-            i_ah = int(line[5])
-            self.Dihedrals[dihedrals_id] = dict(
-                                                 typ=i_typ,
-                                                 ai=i_ai,
-                                                 aj=i_aj,
-                                                 ak=i_ak,
-                                                 ah=i_ah
-                                                )
+    def get_section_array(self,
+                          name: str,  # Name of the section, e.g. `Bonds`
+                          columns: list[str],  # Names of the columns
+                          dtype: type  # Type of the columns after the id
+                          ) -> pd.DataFrame:
+        """parse a section of the body in one call, the first column is
+        the id of each row and is used as the index"""
+        return self.mk_section_df(
+            self.section_rows(name, load_rows, len(columns) + 1),
+            columns, dtype)
+
+    def mk_section_df(self,
+                      data: np.ndarray,  # The numbers, one row per line
+                      columns: list[str],  # Names of the columns
+                      dtype: type  # Type of the columns after the id
+                      ) -> pd.DataFrame:
+        """put the rows of a section in a DataFrame indexed by the id"""
+        if not len(data):
+            data = np.zeros((0, len(columns) + 1))
+        df: pd.DataFrame = pd.DataFrame(data[:, 1:].astype(dtype),
+                                        columns=columns,
+                                        index=data[:, 0].astype(np.int64))
+        del data
+        return df
+
+    def get_velocities(self) -> pd.DataFrame:
+        return self.get_section_array(
+               'Velocities', ['vx', 'vy', 'vz'], np.float64)
+
+    def get_bonds(self) -> pd.DataFrame:
+        if not self.has_comments('Bonds'):
+            return self.get_section_array(
+                   'Bonds', ['typ', 'ai', 'aj'], np.int64)
+        # The names are taken with the numbers, in the same pass
+        data, names = self.section_rows('Bonds', load_comments, 4)
+        df: pd.DataFrame = self.mk_section_df(
+                           data, ['typ', 'ai', 'aj'], np.int64)
+        set_comments(df, names)
+        return df
+
+    def get_angles(self) -> pd.DataFrame:
+        return self.get_section_array(
+               'Angles', ['typ', 'ai', 'aj', 'ak'], np.int64)
+
+    def get_dihedrals(self) -> pd.DataFrame:
+        return self.get_section_array(
+               'Dihedrals', ['typ', 'ai', 'aj', 'ak', 'ah'], np.int64)
+
+    def has_comments(self,
+                     name: str  # Name of the section, e.g. `Bonds`
+                     ) -> bool:
+        """if any line of the section has a comment (`#`)"""
+        if name not in self.Sections:
+            return False
+        offset, nbytes, _ = self.Sections[name]
+        return self.mm.find(b'#', offset, offset + nbytes) >= 0
+
+    def has_images(self,
+                   ncols: int  # Number of the columns without image flags
+                   ) -> bool:
+        """if the first line of the Atoms section has the image flags;
+        the missing flags are set to zero by the parser"""
+        if 'Atoms' not in self.Sections:
+            return False
+        offset, nbytes, _ = self.Sections['Atoms']
+        end: int = offset + nbytes
+        while offset < end:
+            stop: int = self.mm.find(b'\n', offset, end)
+            stop = end if stop < 0 else stop
+            tokens: list[bytes] = \
+                self.mm[offset:stop].split(b'#')[0].split()
+            if tokens:
+                return len(tokens) >= ncols + 3
+            offset = stop + 1
+        return False
 
     def set_masses(self) -> pd.DataFrame:
         names_list: list[str] = []  # list to store all the names
@@ -476,13 +626,191 @@ class Body(Header):
         return Masses_df
 
 
+class DataCache:
+    """binary copy of a parsed data file
+    The header, masses and atoms are saved next to the data file
+    (`fname.cache.npz`, not compressed) with the path, size and
+    modification time of the file and the version of the parser. The
+    cache is used only if all of them are the same.
+    A section of the topology (velocities, bonds, ...) is added to the
+    cache the first time it is parsed, and then it is read from it
+    only when it is asked for.
+    """
+    VERSION: int = 4  # Change it when the parsed data changes
+    HEADER: list[str] = ['NAtoms', 'NBonds', 'NAngles', 'NDihedrals',
+                         'NAtomTyp', 'NBondTyp', 'NAngleTyp', 'NDihedralTyp',
+                         'Xlim', 'Ylim', 'Zlim', 'Titles', 'q_flag']
+    BY_TYPE: list[str] = ['Names', 'Masses', 'PairCoeff', 'BondCoeff',
+                          'AngleCoeff', 'DihedralCoeff']
+    # Columns of the sections of the body after the id
+    SECTIONS: dict[str, tuple[list[str], type]] = {
+        'Velocities': (['vx', 'vy', 'vz'], np.float64),
+        'Bonds': (['typ', 'ai', 'aj'], np.int64),
+        'Angles': (['typ', 'ai', 'aj', 'ak'], np.int64),
+        'Dihedrals': (['typ', 'ai', 'aj', 'ak', 'ah'], np.int64)}
+
+    def __init__(self,
+                 infile: str  # Name of the data file
+                 ) -> None:
+        self.infile: str = infile
+        self.cname: str = f'{infile}.cache.npz'
+        self.data: typing.Any = None  # The open npz file, after loading
+
+    def get_stamp(self) -> np.ndarray:
+        """size and modification time of the data file, and version"""
+        stat: os.stat_result = os.stat(self.infile)
+        return np.array([stat.st_size, stat.st_mtime_ns, self.VERSION],
+                        dtype=np.int64)
+
+    def writable(self) -> bool:
+        """if the cache file can be written"""
+        if os.path.exists(self.cname):
+            return os.access(self.cname, os.W_OK)
+        return os.access(os.path.dirname(os.path.abspath(self.cname)),
+                         os.W_OK)
+
+    def load(self,
+             obj: 'Body'  # The reader to set the attributes of
+             ) -> bool:
+        """set the header and atoms of obj if the cache is still for
+        this file"""
+        if not os.path.exists(self.cname):
+            return False
+        try:
+            data = np.load(self.cname)
+            if not np.array_equal(data['stamp'], self.get_stamp()) or \
+               str(data['path']) != os.path.abspath(self.infile):
+                data.close()
+                return False
+            header: dict[str, typing.Any] = json.loads(str(data['header']))
+            atoms = atom_table.AtomTable(
+                atom_id=data['atom_id'],
+                mol=data['mol'],
+                typ=data['typ'],
+                xyz=data['xyz'],
+                images=data['images'],
+                charge=data['charge'] if 'charge' in data else None,
+                dtype=obj.dtype,
+                has_images=bool(data['has_images']))
+            order: np.ndarray = data['mol_order']
+            atoms.mol_index = atom_table.MolIndex(order, atoms.mol[order])
+        except (OSError, KeyError, ValueError):
+            return False
+        print(f'{bcolors.OKCYAN}{obj.__class__.__name__}:\n'
+              f'\tReading: `{self.infile}` from `{self.cname}`'
+              f'{bcolors.ENDC}\n')
+        for key in self.HEADER:
+            if key in header:
+                setattr(obj, key, header[key])
+        for key in self.BY_TYPE:
+            setattr(obj, key, {int(k): v for k, v in header[key].items()})
+        atoms.Names = obj.Names
+        obj.atoms = atoms
+        obj.Masses_df = obj.set_masses()
+        self.data = data
+        return True
+
+    def save(self,
+             obj: 'Body'  # The reader with the parsed file
+             ) -> bool:
+        """write the header and atoms of the file; return if written"""
+        header: dict[str, typing.Any] = {key: getattr(obj, key)
+                                         for key in self.HEADER
+                                         if hasattr(obj, key)}
+        header.update({key: getattr(obj, key) for key in self.BY_TYPE})
+        arrays: dict[str, np.ndarray] = dict(
+            stamp=self.get_stamp(),
+            path=np.array(os.path.abspath(self.infile)),
+            header=np.array(json.dumps(header)),
+            atom_id=obj.atoms.atom_id,
+            mol=obj.atoms.mol,
+            typ=obj.atoms.typ,
+            xyz=obj.atoms.xyz,
+            images=obj.atoms.images,
+            has_images=np.array(obj.atoms.has_images),
+            mol_order=obj.atoms.mol_index.order)
+        if obj.atoms.charge is not None:
+            arrays['charge'] = obj.atoms.charge
+        return self.write(arrays)
+
+    def add(self,
+            name: str,  # Name of the section, e.g. `Bonds`
+            df: pd.DataFrame  # The section as the parser returns it
+            ) -> None:
+        """add a parsed section of the body to the cache"""
+        if self.data is None:
+            return
+        columns, dtype = self.SECTIONS[name]
+        arrays: dict[str, np.ndarray] = \
+            {key: self.data[key] for key in self.data.files}
+        arrays[f'{name}_id'] = df.index.to_numpy(dtype=np.int64)
+        arrays[name] = df[columns].to_numpy(dtype=dtype)
+        if 'name' in df:
+            arrays[f'{name}_name'] = df['name'].fillna('').to_numpy(dtype=str)
+        self.data.close()
+        self.write(arrays)
+
+    def write(self,
+              arrays: dict[str, np.ndarray]  # All the arrays of the cache
+              ) -> bool:
+        """write the arrays to a new file which replaces the cache, and
+        open it; return if written"""
+        try:
+            with open(f'{self.cname}.tmp', 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(f'{self.cname}.tmp', self.cname)
+        except OSError:
+            print(f'\t{bcolors.WARNING}Warning: Could not write the cache '
+                  f'file: `{self.cname}`{bcolors.ENDC}\n')
+            self.data = None
+            return False
+        self.data = np.load(self.cname)
+        return True
+
+    def has(self,
+            name: str  # Name of the section, e.g. `Bonds`
+            ) -> bool:
+        """if the section is in the cache"""
+        return self.data is not None and name in self.data.files
+
+    def get_df(self,
+               name: str  # Name of the section, e.g. `Bonds`
+               ) -> pd.DataFrame:
+        """return a section of the body in the same form as the parser"""
+        columns: list[str] = self.SECTIONS[name][0]
+        df: pd.DataFrame = pd.DataFrame(self.data[name], columns=columns,
+                                        index=self.data[f'{name}_id'])
+        if f'{name}_name' in self.data:
+            set_comments(df, self.data[f'{name}_name'].astype(object))
+        return df
+
+
 class ReadData(Body):
     """reading the input file
     This class call all other classes and make one output file
     """
-    def __init__(self, infile) -> None:
-        super().__init__(infile)
+    def __init__(self,
+                 infile: str,  # name for the IO file
+                 dtype: type = np.float64,  # Type of the coordinates
+                 cache: bool = True,  # Use and write the binary cache
+                 types: typing.Union[list[int], None] = None,  # Wanted
+                 zrange: typing.Union[tuple[float, float], None] = None,
+                 nworkers: int = 1  # Number of the processes to parse
+                 ) -> None:
+        super().__init__(infile, dtype, cache, types, zrange, nworkers)
 
 
 if __name__ == '__main__':
-    ReadData(sys.argv[1])
+    # With the numbers of the workers, e.g. `1 2 4 8`, time the parsing
+    if len(sys.argv) > 2:
+        import time
+        for n_proc in [int(item) for item in sys.argv[2:]]:
+            start = time.perf_counter()
+            data = ReadData(sys.argv[1], cache=False, nworkers=n_proc)
+            for topo in ['Velocities_df', 'Bonds_df', 'Angles_df',
+                         'Dihedrals_df']:
+                getattr(data, topo)
+            print(f'\tworkers: {n_proc}, '
+                  f'time: {time.perf_counter() - start:.3f} [s]')
+    else:
+        ReadData(sys.argv[1])
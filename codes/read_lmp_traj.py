@@ -0,0 +1,404 @@
+import os
+import sys
+import typing
+import itertools
+import functools
+import numpy as np
+import pandas as pd
+import atom_table
+from colors_text import TextColor as bcolors
+
+
+class Doc:
+    """read trajectory files from LAMMPS `dump` command
+    The file is read frame by frame, so the memory stays the same for
+    any number of frames in the file.
+    Each frame in the file must look like:
+        ITEM: TIMESTEP
+        1000
+        ITEM: NUMBER OF ATOMS
+        9496
+        ITEM: BOX BOUNDS pp pp pp
+        0.0 56.436
+        0.0 30.101
+        0.0 60.977
+        ITEM: ATOMS id mol type x y z ix iy iz
+        1 1 4 0.925 0.0 0.293 0 0 0
+        ...
+    The coordinates could be any of:
+        x y z: wrapped, with or without the image flags (ix iy iz);
+            without the flags the molecules are made whole by the
+            minimum image (pbc)
+        xu yu zu: unwrapped, image flags are set to zero
+        xs ys zs: scaled, converted to the box units
+        xsu ysu zsu: scaled and unwrapped
+    Only the atoms of some types and/or in a range of z (lo <= z < hi,
+    in the box units) can be kept; the other lines are not parsed.
+    The box must be orthogonal; a tilted (triclinic) box, with `xy xz
+    yz` in its BOX BOUNDS, is not supported.
+    Output:
+        Frames with the atoms in an AtomTable and the box of each frame
+    """
+
+
+class Frame:
+    """one snapshot of the trajectory
+    atoms are in a typed table sorted by the atom id, and the box is in
+    the same form as the Header of the data file (Xlim, ...); the index
+    of the molecules (atoms.mol_index) is made once for each frame
+    """
+    def __init__(self,
+                 timestep: int,  # Timestep of the frame
+                 box: np.ndarray,  # lo and hi of the box in x, y, z (3x2)
+                 atoms: atom_table.AtomTable  # Atoms of the frame
+                 ) -> None:
+        self.timestep: int = timestep
+        self.box: np.ndarray = box
+        self.Xlim: list[float] = box[0].tolist()
+        self.Ylim: list[float] = box[1].tolist()
+        self.Zlim: list[float] = box[2].tolist()
+        self.atoms: atom_table.AtomTable = atoms
+        self.NAtoms: int = len(atoms)
+
+    @functools.cached_property
+    def Atoms_df(self) -> pd.DataFrame:
+        """atoms of the frame in the same columns as the data file"""
+        return self.atoms.to_df()
+
+
+class FrameIndex:
+    """byte offset, timestep and number of atoms of every frame
+    The index is saved next to the trajectory (`fname.idx.npz`) with
+    the size and modification time of the trajectory, and it is built
+    again only if the trajectory has changed.
+    """
+    KEY: bytes = b'ITEM: TIMESTEP'
+    CHUNK: int = 1 << 26  # Bytes to read in every step of the scan
+
+    def __init__(self,
+                 fname: str  # Name of the trajectory file
+                 ) -> None:
+        self.fname: str = fname
+        self.iname: str = f'{fname}.idx.npz'
+        self.offsets: np.ndarray  # Byte offset of each `ITEM: TIMESTEP`
+        self.timesteps: np.ndarray  # Timestep of each frame
+        self.natoms: np.ndarray  # Number of atoms in each frame
+        if not self.load_index():
+            self.mk_index()
+            self.save_index()
+        self.NFrames: int = len(self.offsets)
+
+    def get_stamp(self) -> np.ndarray:
+        """size and modification time of the trajectory"""
+        stat: os.stat_result = os.stat(self.fname)
+        return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    def load_index(self) -> bool:
+        """load the index if it is there and still for this file"""
+        if not os.path.exists(self.iname):
+            return False
+        try:
+            with np.load(self.iname) as index:
+                if not np.array_equal(index['stamp'], self.get_stamp()):
+                    return False
+                self.offsets = index['offsets']
+                self.timesteps = index['timesteps']
+                self.natoms = index['natoms']
+        except (OSError, KeyError, ValueError):
+            return False
+        return True
+
+    def save_index(self) -> None:
+        try:
+            with open(self.iname, 'wb') as f:
+                np.savez(f, stamp=self.get_stamp(), offsets=self.offsets,
+                         timesteps=self.timesteps, natoms=self.natoms)
+        except OSError:
+            print(f'\t{bcolors.WARNING}Warning: Could not write the index '
+                  f'file: `{self.iname}`{bcolors.ENDC}\n')
+
+    def mk_index(self) -> None:
+        """scan the file once and find all the frames"""
+        print(f'{bcolors.OKCYAN}\t{self.__class__.__name__}:\n'
+              f'\t\tIndexing frames of `{self.fname}`{bcolors.ENDC}\n')
+        offsets: list[int] = []  # Byte offset of each frame
+        timesteps: list[int] = []  # Timestep of each frame
+        natoms: list[int] = []  # Number of atoms of each frame
+        base: int = 0  # Offset of the buffer in the file
+        tail: bytes = b''  # End of the last chunk, to find a split key
+        with open(self.fname, 'rb') as f:
+            while True:
+                chunk = f.read(self.CHUNK)
+                buf = tail + chunk
+                keep: int = max(len(buf) - len(self.KEY) + 1, 0)
+                pos: int = buf.find(self.KEY)
+                while pos >= 0:
+                    lines = buf[pos:pos + 256].split(b'\n', 4)
+                    if len(lines) < 5 and chunk:
+                        # The frame head is split between two chunks
+                        keep = pos
+                        break
+                    offsets.append(base + pos)
+                    timesteps.append(int(lines[1]))
+                    natoms.append(int(lines[3]))
+                    keep = max(keep, pos + len(self.KEY))
+                    pos = buf.find(self.KEY, pos + len(self.KEY))
+                if not chunk:
+                    break
+                base += keep
+                tail = buf[keep:]
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.timesteps = np.array(timesteps, dtype=np.int64)
+        self.natoms = np.array(natoms, dtype=np.int64)
+
+    def select(self,
+               frames: slice = slice(None),  # Frames to read, as a slice
+               tmin: typing.Union[int, None] = None,  # First timestep
+               tmax: typing.Union[int, None] = None  # Last timestep
+               ) -> np.ndarray:
+        """return the index of the selected frames
+        The timesteps bound the frames first, then the slice is applied,
+        negative start and stop are counted from the end."""
+        first: int = 0
+        last: int = self.NFrames
+        if tmin is not None:
+            first = int(np.searchsorted(self.timesteps, tmin, side='left'))
+        if tmax is not None:
+            last = int(np.searchsorted(self.timesteps, tmax, side='right'))
+        return np.arange(first, last, dtype=np.int64)[frames]
+
+    def split(self,
+              ids: np.ndarray,  # Index of the selected frames
+              nparts: int  # Number of the parts, e.g. number of workers
+              ) -> list[np.ndarray]:
+        """split the frames into contiguous parts of about same size"""
+        return [part for part in np.array_split(ids, nparts) if len(part)]
+
+
+class ReadTraj:
+    """read the dump file and yield one frame at a time"""
+    # Names of the columns in the dump file and in the frames
+    INTS: dict[str, str] = {'id': 'atom_id', 'mol': 'mol', 'type': 'typ',
+                            'ix': 'nx', 'iy': 'ny', 'iz': 'nz'}
+    FLOATS: dict[str, str] = {'q': 'charge',
+                              'vx': 'vx', 'vy': 'vy', 'vz': 'vz'}
+    COORDS: tuple[str, ...] = ('', 'u', 's', 'su')
+
+    def __init__(self,
+                 fname: str,  # Name of the trajectory file
+                 dtype: type = np.float64,  # Type of the coordinates
+                 types: typing.Union[list[int], None] = None,  # Wanted
+                 zrange: typing.Union[tuple[float, float], None] = None
+                 ) -> None:
+        self.fname: str = fname
+        self.dtype: type = dtype
+        self.types: typing.Union[list[int], None] = types
+        self.zrange: typing.Union[tuple[float, float], None] = zrange
+        print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
+              f'\tReading: `{self.fname}`{bcolors.ENDC}\n')
+
+    @functools.cached_property
+    def index(self) -> FrameIndex:
+        """index of the frames, made or loaded at the first use; the box
+        of the first frame is checked here, before any worker reads"""
+        index: FrameIndex = FrameIndex(self.fname)
+        if index.NFrames:
+            with open(self.fname, 'rb') as f:
+                f.seek(index.offsets[0])
+                head: list[str] = [f.readline().decode() for _ in range(5)]
+            self.check_box(head[4], int(index.timesteps[0]))
+        return index
+
+    def frames(self,
+               frames: slice = slice(None),  # Frames to read, as a slice
+               tmin: typing.Union[int, None] = None,  # First timestep
+               tmax: typing.Union[int, None] = None  # Last timestep
+               ) -> typing.Iterator[Frame]:
+        """yield the frames of the file one by one
+        With no selection the file is streamed from the top, otherwise
+        the index is used to seek to the selected frames."""
+        if frames == slice(None) and tmin is None and tmax is None:
+            with open(self.fname, 'rb') as f:
+                while True:
+                    frame = self.read_frame(f)
+                    if frame is None:
+                        break
+                    yield frame
+        else:
+            yield from self.read_frames(self.index.select(frames, tmin, tmax))
+
+    def read_frames(self,
+                    ids: np.ndarray  # Index of the frames to read
+                    ) -> typing.Iterator[Frame]:
+        """seek to each of the frames and yield it"""
+        with open(self.fname, 'rb') as f:
+            for i in ids:
+                f.seek(self.index.offsets[i])
+                yield self.read_frame(f)
+
+    def get_frame(self,
+                  i: int  # Index of the frame in the file
+                  ) -> Frame:
+        """read one frame directly"""
+        return next(self.read_frames(np.array([i])))
+
+    def read_frame(self,
+                   f: typing.BinaryIO  # The file, at the start of a frame
+                   ) -> typing.Union[Frame, None]:
+        """read the next frame from the file, None at the end of it"""
+        timestep: int  # Timestep of the frame
+        natoms: int  # Number of the atoms in the frame
+        box: np.ndarray  # lo and hi of the box
+        keys: list[str]  # Name of the columns in `ITEM: ATOMS`
+        line: str = f.readline().decode()
+        while line and not line.strip():
+            line = f.readline().decode()
+        if not line:
+            return None
+        self.check_item(line, 'TIMESTEP')
+        timestep = int(f.readline().split()[0])
+        self.check_item(f.readline().decode(), 'NUMBER OF ATOMS')
+        natoms = int(f.readline().split()[0])
+        line = f.readline().decode()
+        self.check_item(line, 'BOX BOUNDS')
+        self.check_box(line, timestep)
+        box = np.array([f.readline().split()[:2] for _ in range(3)],
+                       dtype=np.float64)
+        line = f.readline().decode()
+        self.check_item(line, 'ATOMS')
+        keys = line.split()[2:]
+        lines: list[str] = \
+            b''.join(itertools.islice(f, natoms)).decode().splitlines()
+        if len(lines) < natoms:
+            exit(f'{bcolors.FAIL}{self.__class__.__name__}: Frame at '
+                 f'timestep `{timestep}` is not complete in '
+                 f'`{self.fname}`{bcolors.ENDC}\n')
+        return Frame(timestep, box, self.get_columns(lines, keys, box))
+
+    def check_item(self,
+                   line: str,  # Line which must be an ITEM line
+                   item: str  # Name of the expected ITEM
+                   ) -> None:
+        if not line.startswith(f'ITEM: {item}'):
+            exit(f'{bcolors.FAIL}{self.__class__.__name__}: Expected '
+                 f'`ITEM: {item}` in `{self.fname}` but got: '
+                 f'`{line.strip()}`{bcolors.ENDC}\n'
+                 f'{bcolors.OKGREEN}\n{Doc.__doc__}{bcolors.ENDC}\n')
+
+    def check_box(self,
+                  line: str,  # The `ITEM: BOX BOUNDS` line
+                  timestep: int  # Timestep of the frame
+                  ) -> None:
+        """exit if the box is tilted, its limits would be read as the
+        limits of an orthogonal box"""
+        if 'xy' in line.split()[3:]:
+            exit(f'{bcolors.FAIL}{self.__class__.__name__}: The box of the '
+                 f'frame at timestep `{timestep}` in `{self.fname}` is '
+                 f'triclinic (`{line.strip()}`), only orthogonal boxes are '
+                 f'supported{bcolors.ENDC}\n')
+
+    def get_columns(self,
+                    lines: list[str],  # Lines of the atoms in the frame
+                    keys: list[str],  # Name of the columns in the frame
+                    box: np.ndarray  # lo and hi of the box
+                    ) -> atom_table.AtomTable:
+        """parse all the (wanted) atoms of the frame in one call"""
+        usecols: dict[str, int] = self.get_usecols(keys)
+        lines = self.keep_lines(lines, usecols, box[2])
+        data: np.ndarray  # All the wanted numbers, one row per atom
+        data = np.loadtxt(lines, usecols=list(usecols.values()), ndmin=2) \
+            if lines else np.zeros((0, len(usecols)))
+        data = data.reshape(len(lines), len(usecols))
+        cols: dict[str, np.ndarray] = \
+            {key: data[:, i] for i, key in enumerate(usecols)}
+        columns: dict[str, np.ndarray] = dict()
+        order: np.ndarray = np.argsort(cols['id'], kind='stable')
+        natoms: int = len(lines)
+        has_images: bool = True  # Flags or unwrapped xyz in every axis
+        for key, name in self.INTS.items():
+            if key in cols:
+                columns[name] = cols[key][order]
+            elif key != 'id':
+                columns[name] = np.zeros(natoms)
+        for i, axis in enumerate(['x', 'y', 'z']):
+            columns[axis] = self.get_coord(cols, axis, box[i])[order]
+            if axis not in cols and f'{axis}s' not in cols:
+                # Unwrapped coordinates, the image flags are in them
+                columns[f'n{axis}'][:] = 0
+            elif f'i{axis}' not in cols:
+                has_images = False
+        for key, name in self.FLOATS.items():
+            if key in cols:
+                columns[name] = cols[key][order]
+        del data, cols
+        return atom_table.AtomTable(
+            atom_id=columns['atom_id'],
+            mol=columns['mol'],
+            typ=columns['typ'],
+            xyz=np.column_stack((columns['x'], columns['y'], columns['z'])),
+            images=np.column_stack(
+                (columns['nx'], columns['ny'], columns['nz'])),
+            charge=columns.get('charge'),
+            extra={k: columns[k] for k in ['vx', 'vy', 'vz'] if k in columns},
+            dtype=self.dtype,
+            has_images=has_images)
+
+    def keep_lines(self,
+                   lines: list[str],  # Lines of the atoms in the frame
+                   usecols: dict[str, int],  # Index of the known columns
+                   lim: np.ndarray  # lo and hi of the box in z
+                   ) -> list[str]:
+        """drop the lines of the atoms which are not wanted"""
+        if self.types is None and self.zrange is None:
+            return lines
+        if self.types is not None and 'type' not in usecols:
+            exit(f'{bcolors.FAIL}{self.__class__.__name__}: There is no '
+                 f'`type` column in `{self.fname}`{bcolors.ENDC}\n')
+        z_key: str = [f'z{kind}' for kind in self.COORDS
+                      if f'z{kind}' in usecols][0]
+        zrange: typing.Union[tuple[float, float], None] = self.zrange
+        if zrange is not None and z_key.startswith('zs'):
+            length: float = lim[1] - lim[0]
+            zrange = ((zrange[0] - lim[0]) / length,
+                      (zrange[1] - lim[0]) / length)
+        return atom_table.keep_lines(lines, usecols.get('type', 0),
+                                     self.types, usecols[z_key], zrange)
+
+    def get_usecols(self,
+                    keys: list[str]  # Name of the columns in the frame
+                    ) -> dict[str, int]:
+        """return the index of the known columns of the frame"""
+        known: list[str] = list(self.INTS) + list(self.FLOATS)
+        for axis in ['x', 'y', 'z']:
+            known.extend([f'{axis}{kind}' for kind in self.COORDS])
+        usecols: dict[str, int] = \
+            {key: i for i, key in enumerate(keys) if key in known}
+        if 'id' not in usecols:
+            exit(f'{bcolors.FAIL}{self.__class__.__name__}: There is no '
+                 f'`id` column in `{self.fname}`{bcolors.ENDC}\n')
+        for axis in ['x', 'y', 'z']:
+            if not any(f'{axis}{kind}' in usecols for kind in self.COORDS):
+                exit(f'{bcolors.FAIL}{self.__class__.__name__}: There is '
+                     f'no `{axis}` coordinate in `{self.fname}`; '
+                     f'columns: `{" ".join(keys)}`{bcolors.ENDC}\n')
+        return usecols
+
+    def get_coord(self,
+                  cols: dict[str, np.ndarray],  # Parsed columns
+                  axis: str,  # Name of the axis
+                  lim: np.ndarray  # lo and hi of the box in this axis
+                  ) -> np.ndarray:
+        """return the coordinate in box units, from the best column"""
+        length: float = lim[1] - lim[0]
+        if axis in cols:
+            return cols[axis]
+        if f'{axis}u' in cols:
+            return cols[f'{axis}u']
+        if f'{axis}s' in cols:
+            return lim[0] + cols[f'{axis}s'] * length
+        return lim[0] + cols[f'{axis}su'] * length
+
+
+if __name__ == '__main__':
+    for frame in ReadTraj(sys.argv[1]).frames():
+        print(f'\ttimestep: {frame.timestep}, atoms: {frame.NAtoms}')
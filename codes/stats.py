@@ -0,0 +1,186 @@
+import typing
+import numpy as np
+
+
+class Doc:
+    """online statistics for all the styles
+    The values are added frame by frame (or molecule by molecule) and
+    the memory does not grow with the number of them:
+        Welford: mean, variance and standard error of the mean, of
+            scalars or arrays (e.g., a tensor), added one by one or in
+            batches
+        Histogram: counts in fixed bins, in one or more dimensions
+        BlockAverage: standard error of the mean of a correlated time
+            series (e.g., a value of each frame) by blocking:
+                Flyvbjerg and Petersen, J. Chem. Phys. 91, 461 (1989)
+            each level keeps only the statistics of the averages of two
+            values of the level below it, so the memory is log2(N)
+    Welford and Histogram can be merged with another one of the same
+    kind, e.g., from another part of the trajectory.
+    With one value (e.g., one data file) there is no error; it is nan
+    and is printed as `n/a` (error_text).
+    """
+
+
+def error_text(error: float,  # Standard error of a mean, or nan
+               spec: str = '.4f'  # Format of the number
+               ) -> str:
+    """the error to print, `n/a` if it is not known (one frame)"""
+    return f'{error:{spec}}' if np.isfinite(error) else 'n/a'
+
+
+class Welford:
+    """running mean and variance"""
+    def __init__(self,
+                 shape: tuple[int, ...] = ()  # Shape of each value
+                 ) -> None:
+        self.n: int = 0  # Number of the values
+        self.mean: np.ndarray = np.zeros(shape)  # Mean of the values
+        self.m2: np.ndarray = np.zeros(shape)  # Sum of squares of diffs
+
+    def add(self,
+            value: typing.Union[float, np.ndarray]  # One value
+            ) -> None:
+        """add one value"""
+        self.n += 1
+        delta: np.ndarray = value - self.mean
+        self.mean = self.mean + delta / self.n
+        self.m2 = self.m2 + delta * (value - self.mean)
+
+    def add_batch(self,
+                  values: np.ndarray  # Values, one in each row
+                  ) -> None:
+        """add all the values at once"""
+        if len(values):
+            batch: Welford = Welford(np.shape(self.mean))
+            batch.n = len(values)
+            batch.mean = np.mean(values, axis=0)
+            batch.m2 = np.sum((values - batch.mean)**2, axis=0)
+            self.merge(batch)
+
+    def merge(self,
+              other: 'Welford'  # Statistics of other values
+              ) -> None:
+        """add the statistics of other values (Chan et al.)"""
+        if other.n == 0:
+            return
+        n: int = self.n + other.n
+        delta: np.ndarray = other.mean - self.mean
+        self.mean = self.mean + delta * other.n / n
+        self.m2 = self.m2 + other.m2 + delta**2 * self.n * other.n / n
+        self.n = n
+
+    @property
+    def var(self) -> np.ndarray:
+        """sample variance of the values"""
+        return self.m2 / (self.n - 1) if self.n > 1 else self.m2 * np.nan
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var)
+
+    @property
+    def sem(self) -> np.ndarray:
+        """standard error of the mean, for uncorrelated values"""
+        return np.sqrt(self.var / self.n) if self.n > 1 else self.std
+
+
+class Histogram:
+    """counts in fixed bins; a value on the upper edge of the range is
+    in the last bin, and values out of the range are only counted"""
+    def __init__(self,
+                 bins: tuple[int, ...],  # Number of the bins in each dim
+                 ranges: tuple[tuple[float, float], ...]  # lo, hi of dims
+                 ) -> None:
+        self.bins: tuple[int, ...] = tuple(bins)
+        self.ranges: np.ndarray = np.array(ranges, dtype=np.float64)
+        self.counts: np.ndarray = np.zeros(self.bins, dtype=np.int64)
+        self.outside: int = 0  # Number of values out of the ranges
+
+    def add(self,
+            *values: np.ndarray  # Values of each dimension, same length
+            ) -> None:
+        """add the values to the bins"""
+        flat: np.ndarray = np.zeros(len(values[0]), dtype=np.int64)
+        inside: np.ndarray = np.ones(len(values[0]), dtype=bool)
+        for value, nbin, (lo, hi) in zip(values, self.bins, self.ranges):
+            i_bin = np.floor((value - lo) / (hi - lo) * nbin)
+            i_bin[value == hi] = nbin - 1
+            inside &= (i_bin >= 0) & (i_bin < nbin)
+            flat = flat * nbin + np.clip(i_bin, 0, nbin - 1).astype(np.int64)
+        self.outside += int(len(inside) - np.count_nonzero(inside))
+        self.counts += np.bincount(flat[inside], minlength=self.counts.size
+                                   ).reshape(self.bins)
+
+    def add_counts(self,
+                   counts: np.ndarray  # Counts in the same bins
+                   ) -> None:
+        """add counts which are already binned"""
+        self.counts += counts
+
+    def merge(self,
+              other: 'Histogram'  # Histogram with the same bins
+              ) -> None:
+        self.counts += other.counts
+        self.outside += other.outside
+
+    def edges(self,
+              dim: int = 0  # Dimension of the histogram
+              ) -> np.ndarray:
+        lo, hi = self.ranges[dim]
+        return np.linspace(lo, hi, self.bins[dim] + 1)
+
+    def centers(self,
+                dim: int = 0  # Dimension of the histogram
+                ) -> np.ndarray:
+        edges: np.ndarray = self.edges(dim)
+        return 0.5 * (edges[1:] + edges[:-1])
+
+
+class BlockAverage:
+    """standard error of the mean of a correlated series by blocking"""
+    MINBLOCKS: int = 16  # Fewest blocks of a level to trust its error
+
+    def __init__(self) -> None:
+        self.levels: list[Welford] = []  # Statistics of each level
+        self.pending: list[typing.Union[float, None]] = []  # Waiting value
+
+    def add(self,
+            value: float  # Next value of the series
+            ) -> None:
+        """add the value to the first level and pass the averages of
+        every two values up to the next level"""
+        level: int = 0
+        while True:
+            if level == len(self.levels):
+                self.levels.append(Welford())
+                self.pending.append(None)
+            self.levels[level].add(value)
+            if self.pending[level] is None:
+                self.pending[level] = value
+                break
+            value = 0.5 * (self.pending[level] + value)
+            self.pending[level] = None
+            level += 1
+
+    @property
+    def n(self) -> int:
+        return self.levels[0].n if self.levels else 0
+
+    @property
+    def mean(self) -> float:
+        return float(self.levels[0].mean) if self.levels else np.nan
+
+    def errors(self) -> np.ndarray:
+        """standard error of the mean from each level"""
+        return np.array([float(stat.sem) for stat in self.levels])
+
+    @property
+    def sem(self) -> float:
+        """the largest error of the levels with enough blocks, which is
+        where the errors reach their plateau for a converged series"""
+        trusted: list[float] = [float(stat.sem) for stat in self.levels
+                                if stat.n >= self.MINBLOCKS]
+        if not trusted:
+            return float(self.levels[0].sem) if self.levels else np.nan
+        return max(trusted)
@@ -0,0 +1,125 @@
+import typing
+import numpy as np
+import pbc
+import stats
+import angle
+import neighbors
+import get_prompt
+import read_json as rejs
+import read_lmp_data as relmp
+from colors_text import TextColor as bcolors
+
+
+class Doc:
+    """tetrahedral order parameter of water oxygens
+    Errington and Debenedetti, Nature 409, 318 (2001):
+        q = 1 - 3/8 sum_{j<k} (cos(psi_jk) + 1/3)^2
+    the sum is over the 6 pairs of the 4 nearest oxygens of an oxygen,
+    and psi_jk is the angle between the vectors to the j-th and k-th
+    of them (minimum image). q is 1 for a perfect tetrahedron and 0 on
+    average for an ideal gas; it can be as low as -3.
+    The 4 nearest oxygens of all the oxygens are found at once by a
+    k-nearest query on the pairs of a cell list (neighbors), inside the
+    cutoff (default 5 A); an oxygen with fewer than 4 oxygens in the
+    cutoff (e.g., at the interface) has no q and is only counted.
+    Output:
+        Average q of all the oxygens and frames
+        tetrahedral_slab.txt: z of the slab, oxygens, average q
+        tetrahedral_q.txt: q, probability density of q
+    """
+
+
+class Tetrahedral(angle.Water):
+    """get q of all the oxygens and accumulate it over the frames"""
+    CUTOFF: float = 5.0  # Cutoff of the neighbour search
+    NQ: int = 200  # Number of the bins of q
+    QRANGE: tuple[float, float] = (-3.0, 1.0)  # Range of the bins of q
+
+    def __init__(self,
+                 files: get_prompt.Prompts  # All the infos in the prompt file
+                 ) -> None:
+        print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
+              f'\tGetting tetrahedral order of water{bcolors.ENDC}')
+        param = rejs.ReadJson(files.jname)
+        self.atom_type: list[int]  # List of the atoms type in the data file
+        self.atom_type = self.get_types(param.df, files.atoms, ('O',))
+        self.types: list[int] = [self.OXYGEN]  # Only O are read
+        self.cutoff: float = files.cutoff or self.CUTOFF
+        self.cells = neighbors.CellList(self.cutoff)
+        self.nframes: int = 0  # Number of the frames
+        self.q_stat = stats.Welford()  # q of all the oxygens
+        self.q_frames = stats.BlockAverage()  # Mean q of each frame
+        self.q_hist = stats.Histogram((self.NQ,), (self.QRANGE,))
+        self.init_slabs()  # q and oxygens in the slabs
+        self.nmissed: int = 0  # Oxygens with fewer than 4 neighbours
+        del files
+
+    def analyse(self,
+                obj: relmp.ReadData  # Data file or a frame of trajectory
+                ) -> dict[str, typing.Any]:
+        """return q of the oxygens of the snapshot and its profile"""
+        orgin: np.ndarray = \
+            obj.atoms.select([self.OXYGEN]).xyz.astype(np.float64)
+        self.cells.set_box(obj)
+        q_o: np.ndarray = self.get_q(orgin)
+        valid: np.ndarray = ~np.isnan(q_o)
+        q_hist = stats.Histogram(self.q_hist.bins, self.q_hist.ranges)
+        q_hist.add(q_o[valid])
+        return dict(q=q_o[valid], q_hist=q_hist,
+                    nmissed=int(np.count_nonzero(~valid)),
+                    **self.get_slabs(orgin[valid, 2], obj.Zlim, q_o[valid]))
+
+    def get_q(self,
+              orgin: np.ndarray  # Coordinates of the oxygens
+              ) -> np.ndarray:
+        """return q of each oxygen, nan if it has fewer than 4
+        neighbours in the cutoff"""
+        i, j, r = self.cells.pairs(orgin)
+        nearest: np.ndarray = neighbors.k_nearest(i, j, r, len(orgin), 4)
+        valid: np.ndarray = (nearest >= 0).all(axis=1)
+        q_o: np.ndarray = np.full(len(orgin), np.nan)
+        centers: np.ndarray = np.flatnonzero(valid)
+        vectors: np.ndarray = self.unit_vector(pbc.min_image(
+            orgin[nearest[valid]] - orgin[centers, None, :],
+            self.cells.box))
+        cos: np.ndarray = np.einsum('nki,nli->nkl', vectors, vectors)
+        upper_j, upper_k = np.triu_indices(4, k=1)
+        q_o[valid] = 1.0 - 0.375 * np.sum(
+            (cos[:, upper_j, upper_k] + 1.0 / 3.0)**2, axis=1)
+        return q_o
+
+    def accumulate(self,
+                   values: dict[str, typing.Any]  # From `analyse`
+                   ) -> None:
+        """add q of one snapshot to the sums"""
+        self.q_stat.add_batch(values['q'])
+        if len(values['q']):
+            self.q_frames.add(np.mean(values['q']))
+        self.q_hist.merge(values['q_hist'])
+        self.add_slabs(values)
+        self.nmissed += values['nmissed']
+        self.nframes += 1
+
+    def print_results(self) -> None:
+        """print the average q and write the profile and distribution"""
+        print(f'{bcolors.OKGREEN}\tNumber of frames = {self.nframes}\n'
+              f'\tAverage q = {float(self.q_stat.mean):.4f} +/- '
+              f'{stats.error_text(self.q_frames.sem)} '
+              f'(std = {float(self.q_stat.std):.4f})\n'
+              f'\tOxygens with fewer than 4 neighbours in '
+              f'{self.cutoff} A = {self.nmissed}{bcolors.ENDC}')
+        self.write_slabs('tetrahedral_slab.txt', 'z [A], oxygens, q')
+        self.write_distribution('tetrahedral_q.txt')
+        print()
+
+    def write_distribution(self,
+                           fname: str  # Name of the output file
+                           ) -> None:
+        """write the probability density of q"""
+        width: float = (self.QRANGE[1] - self.QRANGE[0]) / self.NQ
+        density: np.ndarray = self.q_hist.counts / \
+            max(int(self.q_hist.counts.sum()), 1) / width
+        np.savetxt(fname, np.column_stack((self.q_hist.centers(), density)),
+                   fmt=['%.4f', '%.6f'],
+                   header=f'q, P(q); frames: {self.nframes}')
+        print(f'{bcolors.OKCYAN}\tWrote: `{fname}`{bcolors.ENDC}')
@@ -0,0 +1,76 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# The modules are imported by their names, as main.py does in `codes`
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'codes'))
+
+
+class Box:
+    """box of a snapshot, as the readers give it"""
+    def __init__(self,
+                 lo: np.ndarray,  # Lower corner of the box
+                 length: np.ndarray  # Length of the box in x, y, z
+                 ) -> None:
+        self.Xlim: list[float] = [lo[0], lo[0] + length[0]]
+        self.Ylim: list[float] = [lo[1], lo[1] + length[1]]
+        self.Zlim: list[float] = [lo[2], lo[2] + length[2]]
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    return np.random.default_rng(42)
+
+
+@pytest.fixture
+def data_file(tmp_path, rng) -> str:
+    """a data file of water and chains, with comments in the bonds"""
+    nwater: int = 40
+    nchain: int = 5
+    length: np.ndarray = np.array([18.0, 20.0, 22.0])
+    lines: list[str] = []  # Lines of the Atoms section
+    bonds: list[str] = []  # Lines of the Bonds section
+    atom_id: int = 0
+    for mol in range(1, nwater + 1):
+        orgin = rng.uniform(0.0, 1.0, 3) * length
+        for typ, shift, charge, name in \
+                [(4, (0.0, 0.0, 0.0), -0.8476, 'O'),
+                 (5, (0.8, 0.6, 0.0), 0.4238, 'H'),
+                 (5, (-0.8, 0.6, 0.0), 0.4238, 'H')]:
+            atom_id += 1
+            xyz = orgin + shift
+            image = np.floor(xyz / length).astype(int)
+            xyz = xyz - image * length
+            lines.append(f'{atom_id} {mol} {typ} {charge} '
+                         f'{xyz[0]:.6f} {xyz[1]:.6f} {xyz[2]:.6f} '
+                         f'{image[0]} {image[1]} {image[2]} # {name}')
+        bonds.append(f'{len(bonds) + 1} 1 {atom_id - 2} {atom_id - 1}')
+        bonds.append(f'{len(bonds) + 1} 1 {atom_id - 2} {atom_id} # OH')
+    for mol in range(nwater + 1, nwater + nchain + 1):
+        start = rng.uniform(0.0, 1.0, 3) * length
+        for k in range(10):
+            atom_id += 1
+            typ = 1 if k in (0, 9) else 2
+            xyz = start + np.array([1.2 * k, 0.4 * (k % 2), 0.0])
+            image = np.floor(xyz / length).astype(int)
+            xyz = xyz - image * length
+            lines.append(f'{atom_id} {mol} {typ} 0.0 '
+                         f'{xyz[0]:.6f} {xyz[1]:.6f} {xyz[2]:.6f} '
+                         f'{image[0]} {image[1]} {image[2]}')
+            if k:
+                bonds.append(
+                    f'{len(bonds) + 1} 2 {atom_id - 1} {atom_id} # CC')
+    text: str = (
+        f'# test\n\n{atom_id} atoms\n5 atom types\n{len(bonds)} bonds\n'
+        f'2 bond types\n\n'
+        f'0.0 {length[0]} xlo xhi\n0.0 {length[1]} ylo yhi\n'
+        f'0.0 {length[2]} zlo zhi\n\n'
+        f'Masses\n\n1 15.035 # CH3\n2 14.027 # CH2\n3 1.008 # HC\n'
+        f'4 15.9994 # O\n5 1.008 # H\n\n'
+        f'Atoms # full\n\n' + '\n'.join(lines) + '\n\n'
+        f'Bonds\n\n' + '\n'.join(bonds) + '\n')
+    fname: str = str(tmp_path / 'test.data')
+    with open(fname, 'w') as f:
+        f.write(text)
+    return fname
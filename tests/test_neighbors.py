@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+import pbc
+import neighbors
+from conftest import Box
+
+
+def brute_pairs(xyz: np.ndarray,  # Coordinates of the first set
+                other: np.ndarray,  # Coordinates of the second set
+                box: np.ndarray,  # Length of the box
+                cutoff: float,  # Largest distance of a pair
+                same: bool  # If the two sets are the same
+                ) -> list[tuple[int, int, float]]:
+    """all the pairs closer than the cutoff, O(N^2), sorted"""
+    vec: np.ndarray = pbc.min_image(other[None, :, :] - xyz[:, None, :], box)
+    dist: np.ndarray = np.linalg.norm(vec, axis=-1)
+    close: np.ndarray = dist < cutoff
+    if same:
+        close &= np.triu(np.ones_like(close), k=1)
+    i, j = np.nonzero(close)
+    return sorted((a, b, round(float(dist[a, b]), 9)) for a, b in zip(i, j))
+
+
+def as_list(i: np.ndarray, j: np.ndarray, r: np.ndarray
+            ) -> list[tuple[int, int, float]]:
+    """the pairs sorted, so a pair found twice is seen"""
+    return sorted((a, b, round(float(d), 9)) for a, b, d in zip(i, j, r))
+
+
+# Boxes with one, two, three and many cells in the axes
+@pytest.mark.parametrize('length, cutoff', [
+    ((10.0, 10.0, 10.0), 5.0),
+    ((12.0, 17.0, 25.0), 5.5),
+    ((30.0, 31.0, 29.0), 4.0),
+    ((40.0, 12.0, 60.0), 3.0)])
+def test_pairs_as_brute_force(rng, length, cutoff):
+    box = np.array(length)
+    lo = np.array([-3.0, 1.5, 7.0])
+    xyz = lo + rng.uniform(0.0, 1.0, (400, 3)) * box
+    # Some atoms out of the box, as wrapped by the image flags
+    xyz[:20] += box
+    xyz[20:40] -= box
+    cells = neighbors.CellList(cutoff)
+    cells.set_box(Box(lo, box))
+    i, j, r = cells.pairs(xyz)
+    assert len(i)
+    assert np.all(i < j)
+    assert np.all(np.lexsort((j, i)) == np.arange(len(i)))
+    assert as_list(i, j, r) == brute_pairs(xyz, xyz, box, cutoff, True)
+
+
+def test_pairs_of_two_sets(rng):
+    box = np.array([21.0, 23.0, 26.0])
+    xyz = rng.uniform(0.0, 1.0, (150, 3)) * box
+    other = rng.uniform(0.0, 1.0, (250, 3)) * box
+    cells = neighbors.CellList(6.0)
+    cells.set_box(Box(np.zeros(3), box))
+    i, j, r = cells.pairs(xyz, other)
+    assert as_list(i, j, r) == brute_pairs(xyz, other, box, 6.0, False)
+
+
+def test_pairs_in_chunks(rng, monkeypatch):
+    box = np.array([20.0, 20.0, 20.0])
+    xyz = rng.uniform(0.0, 1.0, (300, 3)) * box
+    cells = neighbors.CellList(4.5)
+    cells.set_box(Box(np.zeros(3), box))
+    whole = cells.pairs(xyz)
+    monkeypatch.setattr(neighbors.CellList, 'CHUNK', 50)
+    chunked = cells.pairs(xyz)
+    for item_a, item_b in zip(whole, chunked):
+        assert np.array_equal(item_a, item_b)
+
+
+def test_no_atoms():
+    cells = neighbors.CellList(3.0)
+    cells.set_box(Box(np.zeros(3), np.array([10.0, 10.0, 10.0])))
+    i, j, r = cells.pairs(np.zeros((0, 3)))
+    assert len(i) == len(j) == len(r) == 0
+
+
+def test_cutoff_more_than_half_of_box():
+    cells = neighbors.CellList(6.0)
+    with pytest.raises(SystemExit):
+        cells.set_box(Box(np.zeros(3), np.array([30.0, 11.0, 30.0])))
+
+
+def test_k_nearest_as_brute_force(rng):
+    box = np.array([15.0, 15.0, 15.0])
+    xyz = rng.uniform(0.0, 1.0, (200, 3)) * box
+    cutoff: float = 4.0
+    cells = neighbors.CellList(cutoff)
+    cells.set_box(Box(np.zeros(3), box))
+    nearest = neighbors.k_nearest(*cells.pairs(xyz), len(xyz), 4)
+    dist = np.linalg.norm(
+        pbc.min_image(xyz[None, :, :] - xyz[:, None, :], box), axis=-1)
+    np.fill_diagonal(dist, np.inf)
+    for atom in range(len(xyz)):
+        expected = [j for j in np.argsort(dist[atom], kind='stable')[:4]
+                    if dist[atom, j] < cutoff]
+        expected += [-1] * (4 - len(expected))
+        assert list(nearest[atom]) == expected
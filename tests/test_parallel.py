@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+import parallel
+import read_lmp_data as relmp
+
+
+def write_section(tmp_path,
+                  rows: list[str]  # Lines of the section
+                  ) -> tuple[str, int, int]:
+    """a file with a head and one section; its name, offset and size"""
+    head: bytes = b'Head of the file\n\nAtoms # full\n\n'
+    body: bytes = ('\n'.join(rows) + '\n\n').encode()
+    fname: str = str(tmp_path / 'section.txt')
+    with open(fname, 'wb') as f:
+        f.write(head + body + b'Bonds\n\n1 1 1 2\n')
+    return fname, len(head), len(body)
+
+
+def atom_rows(rng, natoms: int) -> list[str]:
+    rows: list[str] = []
+    for i in range(1, natoms + 1):
+        xyz = rng.uniform(0.0, 30.0, 3)
+        rows.append(f'{i} {i // 3 + 1} {i % 5 + 1} 0.5 '
+                    f'{xyz[0]:.6f} {xyz[1]:.6f} {xyz[2]:.6f} 0 1 -1')
+    return rows
+
+
+@pytest.mark.parametrize('nparts', [1, 2, 3, 7, 50])
+def test_line_ranges_cover_the_section(tmp_path, rng, nparts):
+    fname, offset, nbytes = write_section(tmp_path, atom_rows(rng, 23))
+    ranges = parallel.line_ranges(fname, offset, nbytes, nparts)
+    with open(fname, 'rb') as f:
+        text: bytes = f.read()
+    assert ranges[0][0] == offset
+    assert ranges[-1][1] == offset + nbytes
+    for (_, hi), (lo, _) in zip(ranges[:-1], ranges[1:]):
+        assert hi == lo
+    for lo, hi in ranges:
+        assert hi > lo
+        assert lo == offset or text[lo - 1:lo] == b'\n'
+    assert len(ranges) <= nparts
+
+
+@pytest.mark.parametrize('nworkers', [2, 3, 8])
+def test_parse_section_as_serial(tmp_path, rng, nworkers):
+    rows = atom_rows(rng, 100)
+    # Lines without the image flags and with comments
+    rows[10] = rows[10].rsplit(' ', 3)[0]
+    rows[40] += ' # H'
+    fname, offset, nbytes = write_section(tmp_path, rows)
+    args = (7, None, 6, None)
+    serial = relmp.load_atoms(rows, *args)
+    data = parallel.parse_section(fname, offset, nbytes, nworkers,
+                                  relmp.load_atoms, *args)
+    assert np.array_equal(data, serial)
+
+
+def test_parse_section_with_comments(tmp_path):
+    rows = [f'{i} 1 {i} {i + 1}' + (f' # B{i}' if i % 3 else '')
+            for i in range(1, 60)]
+    fname, offset, nbytes = write_section(tmp_path, rows)
+    data, names = parallel.parse_section(fname, offset, nbytes, 4,
+                                         relmp.load_comments, 4)
+    serial, serial_names = relmp.load_comments(rows, 4)
+    assert np.array_equal(data, serial)
+    assert names == serial_names
+
+
+def test_parse_section_empty(tmp_path):
+    fname, offset, _ = write_section(tmp_path, [])
+    data = parallel.parse_section(fname, offset, 0, 4, relmp.load_rows, 4)
+    assert data.shape == (0, 4)
+
+
+def test_stitch_different_widths(tmp_path, rng):
+    rows = atom_rows(rng, 10)
+    fname, offset, nbytes = write_section(tmp_path, rows)
+    first = parallel.parse_range((fname, offset, offset + nbytes,
+                                  relmp.load_rows, (4,)))
+    second = parallel.parse_range((fname, offset, offset + nbytes,
+                                   relmp.load_rows, (5,)))
+    with pytest.raises(ValueError):
+        parallel.stitch([first, second])
+    # The blocks are freed
+    with pytest.raises(FileNotFoundError):
+        parallel.free(first[0])
+
+
+def test_read_data_parallel_as_serial(data_file):
+    serial = relmp.ReadData(data_file, cache=False)
+    para = relmp.ReadData(data_file, cache=False, nworkers=3)
+    for key in ['atom_id', 'mol', 'typ', 'xyz', 'images', 'charge']:
+        assert np.array_equal(getattr(para.atoms, key),
+                              getattr(serial.atoms, key))
+    assert para.atoms.has_images and serial.atoms.has_images
+    assert para.Bonds_df.equals(serial.Bonds_df)
+
+
+def test_read_data_bad_line(data_file):
+    with open(data_file) as f:
+        text: str = f.read()
+    with open(data_file, 'w') as f:
+        f.write(text.replace('\n3 1 5 ', '\n3 1 5 x ', 1))
+    for nworkers in [1, 2]:
+        with pytest.raises(SystemExit):
+            relmp.ReadData(data_file, cache=False, nworkers=nworkers)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import read_lmp_traj as relmp_traj
+
+
+@pytest.fixture
+def traj_file(tmp_path, rng) -> str:
+    """a trajectory of frames with different number of atoms"""
+    text: list[str] = []
+    for frame in range(12):
+        natoms: int = 5 + frame % 4
+        text.append(f'ITEM: TIMESTEP\n{100 * frame}\n'
+                    f'ITEM: NUMBER OF ATOMS\n{natoms}\n'
+                    f'ITEM: BOX BOUNDS pp pp pp\n'
+                    f'0.0 10.0\n0.0 11.0\n0.0 {12.0 + frame}\n'
+                    f'ITEM: ATOMS id mol type x y z ix iy iz\n')
+        # The atoms are not in order of id, as in a dump of many procs
+        for atom in rng.permutation(natoms) + 1:
+            xyz = rng.uniform(0.0, 10.0, 3)
+            text.append(f'{atom} {(atom + 1) // 2} {atom % 2 + 1} '
+                        f'{xyz[0]:.5f} {xyz[1]:.5f} {xyz[2]:.5f} 0 0 1\n')
+    fname: str = str(tmp_path / 'test.lammpstrj')
+    with open(fname, 'w') as f:
+        f.write(''.join(text))
+    return fname
+
+
+def test_index(traj_file):
+    index = relmp_traj.FrameIndex(traj_file)
+    with open(traj_file, 'rb') as f:
+        text: bytes = f.read()
+    assert index.NFrames == 12
+    assert np.array_equal(index.timesteps, 100 * np.arange(12))
+    assert np.array_equal(index.natoms, 5 + np.arange(12) % 4)
+    for offset in index.offsets:
+        assert text[offset:].startswith(relmp_traj.FrameIndex.KEY)
+
+
+def test_index_in_small_chunks(traj_file, monkeypatch):
+    index = relmp_traj.FrameIndex(traj_file)
+    monkeypatch.setattr(relmp_traj.FrameIndex, 'CHUNK', 37)
+    small = relmp_traj.FrameIndex(traj_file)
+    small.mk_index()
+    assert np.array_equal(small.offsets, index.offsets)
+    assert np.array_equal(small.timesteps, index.timesteps)
+    assert np.array_equal(small.natoms, index.natoms)
+
+
+def test_index_is_saved(traj_file, monkeypatch):
+    index = relmp_traj.FrameIndex(traj_file)
+    monkeypatch.setattr(relmp_traj.FrameIndex, 'mk_index', None)
+    saved = relmp_traj.FrameIndex(traj_file)
+    assert np.array_equal(saved.offsets, index.offsets)
+
+
+def test_select(traj_file):
+    index = relmp_traj.FrameIndex(traj_file)
+    assert list(index.select(slice(1, None, 3))) == [1, 4, 7, 10]
+    assert list(index.select(tmin=250, tmax=600)) == [3, 4, 5, 6]
+    assert list(index.select(slice(-2, None))) == [10, 11]
+    parts = index.split(np.arange(12), 5)
+    assert np.array_equal(np.concatenate(parts), np.arange(12))
+
+
+def test_read_frames_as_stream(traj_file):
+    reader = relmp_traj.ReadTraj(traj_file)
+    stream = list(reader.frames())
+    ids = reader.index.select(slice(None, None, 2))
+    for i, frame in zip(ids, reader.read_frames(ids)):
+        assert frame.timestep == stream[i].timestep
+        assert frame.Zlim == stream[i].Zlim
+        assert np.array_equal(frame.atoms.atom_id, stream[i].atoms.atom_id)
+        assert np.array_equal(frame.atoms.xyz, stream[i].atoms.xyz)
+    assert all(np.all(np.diff(frame.atoms.atom_id) > 0) for frame in stream)
+    assert all(frame.atoms.has_images for frame in stream)